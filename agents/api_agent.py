@@ -1,20 +1,76 @@
 import requests
 import json
+import os
+import re
+import threading
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
-from llm.llm_interface import get_llm_response
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from agents.body_capture import CHUNK_SIZE, BodyCapture
+from agents.cassette import HTTP_MODES, CassetteStore, request_key
+from agents.http_policy import IDEMPOTENT_METHODS, RequestPolicy
+from agents.load_tester import run_load
+from agents.result_store import ResultStore, TestRecord, render_json, render_junit
+from agents.test_plan import PlanCache, compile_endpoint, compile_plan, load_plan, save_plan
+from agents.validation_rules import RuleSet
+from llm.json_stream import StreamingArrayParser
+from llm.llm_interface import get_llm_response, get_llm_responses, stream_llm_response
 
 class APIAgent:
-    def __init__(self, temperature=0.7):
+    def __init__(self, temperature=0.7, max_concurrency=1, per_host_limit=None, plan_cache_dir=None,
+                 capture_limit=None, spill_dir=None, result_store=None, progress_callback=None,
+                 policy=None, http_mode=None, cassette_dir=None, conditional_requests=False):
         self.temperature = temperature
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.per_host_limit = per_host_limit
+        # Streamed capture: keep at most capture_limit body bytes per response
+        self.capture_limit = capture_limit
+        self.spill_dir = spill_dir
+        plan_cache_dir = plan_cache_dir or os.getenv("API_PLAN_CACHE_DIR")
+        self.plan_cache = PlanCache(plan_cache_dir) if plan_cache_dir else None
+        # Finished tests go to the store as they complete; pass a path for on-disk results
+        if isinstance(result_store, str):
+            result_store = ResultStore(result_store)
+        self.result_store = result_store
+        self.progress_callback = progress_callback
+        self.run_id = None
+        self._run_total = 0
         self.test_results = []
+        self._rule_sets = {}
+        self.policy = policy or RequestPolicy()
+        # record: save every exchange to the cassette store; replay: serve from it, no network
+        self.http_mode = http_mode or os.getenv("API_HTTP_MODE", "live")
+        if self.http_mode not in HTTP_MODES:
+            raise ValueError(f"Unknown HTTP mode: {self.http_mode}")
+        cassette_dir = cassette_dir or os.getenv("API_CASSETTE_DIR")
+        if self.http_mode != "live" and not cassette_dir:
+            raise ValueError(f"HTTP mode '{self.http_mode}' needs a cassette_dir")
+        self.cassettes = CassetteStore(cassette_dir) if cassette_dir else None
+        self.conditional_requests = conditional_requests
         self.session = requests.Session()
+        if self.max_concurrency > 1:
+            # Let every worker keep its own pooled connection per host
+            adapter = HTTPAdapter(pool_maxsize=self.max_concurrency)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
 
-    def run_task(self, prompt: str) -> str:
-        """Main entry point for API testing tasks"""
+    def run_task(self, prompt: str, stream=False) -> str:
+        """Main entry point for API testing tasks
+        
+        With stream=True endpoints start executing while the LLM is still
+        writing the rest of the plan; the report is the same either way.
+        """
         try:
+            cached_plan = self._cached_plan(prompt)
+            if stream and cached_plan is None:
+                results = self._stream_and_execute(prompt)
+                return self._generate_report(results)
+            
             # Use AI to understand the testing request
-            test_plan = self._generate_test_plan(prompt)
+            test_plan = cached_plan or self._generate_test_plan(prompt)
             
             # Execute the test plan
             results = self._execute_test_plan(test_plan)
@@ -25,9 +81,120 @@ class APIAgent:
         except Exception as e:
             return f"API testing failed: {str(e)}"
     
+    def run_tasks(self, prompts: list, max_concurrency=8) -> list:
+        """Plan many API testing tasks with concurrent LLM calls, then run each"""
+        planned = {p: self._cached_plan(p) for p in prompts}
+        to_plan = [p for p in prompts if planned[p] is None]
+        responses = dict(zip(to_plan, get_llm_responses(
+            [self._plan_prompt(prompt) for prompt in to_plan],
+            max_concurrency=max_concurrency
+        )))
+        
+        reports = []
+        for prompt in prompts:
+            try:
+                test_plan = planned[prompt] or self._plan_from_response(prompt, responses[prompt], store=True)
+                reports.append(self._generate_report(self._execute_test_plan(test_plan)))
+            except Exception as e:
+                reports.append(f"API testing failed: {str(e)}")
+        return reports
+    
     def _generate_test_plan(self, prompt: str) -> dict:
         """Use AI to create a structured test plan from natural language"""
-        ai_prompt = f"""
+        response = get_llm_response(self._plan_prompt(prompt))
+        return self._plan_from_response(prompt, response, store=True)
+    
+    def _cached_plan(self, prompt: str):
+        """Compiled plan previously stored for this prompt, if plan caching is on"""
+        if self.plan_cache is None:
+            return None
+        return self.plan_cache.get(prompt)
+    
+    def save_plan(self, prompt: str, path: str) -> dict:
+        """Plan a request once and write the compiled plan to `path` (.json or .msgpack)"""
+        return save_plan(self._cached_plan(prompt) or self._generate_test_plan(prompt), path)
+    
+    def run_plan_file(self, path: str) -> str:
+        """Execute a compiled plan file without any planning step"""
+        try:
+            results = self._execute_test_plan(load_plan(path))
+            return self._generate_report(results)
+            
+        except Exception as e:
+            return f"API testing failed: {str(e)}"
+    
+    def _stream_and_execute(self, prompt: str) -> list:
+        """Plan via a streamed completion, testing endpoints as soon as they parse.
+        
+        Only idempotent endpoints are started early, and only those listed
+        before the first endpoint with an ordering hint or a non-idempotent
+        method: whatever follows may depend on its side effects. Re-running an
+        early start that does not match the final plan is therefore harmless,
+        and early starts honour the plan's (or the agent's) per-host limit.
+        Once the full response is in, it is parsed exactly like the
+        non-streaming path and any endpoint that was not started (or does not
+        match the final plan) is run through the regular scheduler.
+        """
+        parser = StreamingArrayParser("endpoints")
+        chunks = []
+        started = []
+        parsed = 0
+        ordered = False
+        host_slots = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            for delta in stream_llm_response(self._plan_prompt(prompt)):
+                chunks.append(delta)
+                for endpoint in parser.feed(delta):
+                    parsed += 1
+                    base_url = parser.fields.get("base_url")
+                    ordered = ordered or bool(endpoint.get("depends_on") or endpoint.get("sequential"))
+                    if ordered or base_url is None:
+                        ordered = True
+                        continue
+                    try:
+                        endpoint = compile_endpoint(parsed - 1, endpoint)
+                    except (TypeError, ValueError):
+                        ordered = True
+                        continue
+                    if endpoint["method"] not in IDEMPOTENT_METHODS:
+                        # A POST may not be safe to send twice, and later endpoints may rely on it
+                        ordered = True
+                        continue
+                    per_host_limit = parser.fields.get("per_host_limit", self.per_host_limit)
+                    slot = None
+                    if per_host_limit:
+                        host = urlsplit(self._build_url(base_url, endpoint)).netloc
+                        slot = host_slots.setdefault(host, threading.BoundedSemaphore(int(per_host_limit)))
+                    future = pool.submit(self._test_endpoint_limited, slot, base_url, endpoint)
+                    started.append((parsed - 1, base_url, endpoint, future))
+            
+            test_plan = self._plan_from_response(prompt, "".join(chunks), store=True)
+            base_url = test_plan.get("base_url", "")
+            endpoints = test_plan.get("endpoints", [])
+            results = [None] * len(endpoints)
+            self._begin_run(len(endpoints))
+            for i, started_base, endpoint, future in started:
+                result = future.result()
+                if i < len(endpoints) and endpoints[i] == endpoint and started_base == base_url:
+                    results[i] = self._record_result(i, result)
+        
+        if any(result is None for result in results):
+            concurrency = max(1, int(test_plan.get("concurrency", self.max_concurrency)))
+            per_host_limit = test_plan.get("per_host_limit", self.per_host_limit)
+            results = self._execute_concurrently(base_url, endpoints, concurrency, per_host_limit, results)
+        return results
+    
+    def _test_endpoint_limited(self, slot, base_url: str, endpoint: dict) -> dict:
+        """_test_endpoint holding a per-host semaphore (if any) for the duration"""
+        if slot is None:
+            return self._test_endpoint(base_url, endpoint)
+        with slot:
+            return self._test_endpoint(base_url, endpoint)
+    
+    def _plan_prompt(self, prompt: str) -> str:
+        """LLM prompt asking for a structured test plan"""
+        return f"""
         Create an API test plan from this request: {prompt}
         
         Respond with JSON containing:
@@ -46,15 +213,21 @@ class APIAgent:
             ]
         }}
         """
+    
+    def _plan_from_response(self, prompt: str, response: str, store=False) -> dict:
+        """Extract the JSON plan from an LLM response, falling back to simple parsing
         
-        response = get_llm_response(ai_prompt)
-        
+        With store=True a plan the model produced is compiled and added to the
+        plan cache; fallback plans are never cached.
+        """
         try:
             # Extract JSON from response
-            import re
             json_match = re.search(r'\{.*\}', response, re.DOTALL)
             if json_match:
-                return json.loads(json_match.group())
+                test_plan = compile_plan(json.loads(json_match.group()))
+                if store and self.plan_cache is not None:
+                    self.plan_cache.put(prompt, test_plan)
+                return test_plan
         except:
             pass
         
@@ -64,7 +237,6 @@ class APIAgent:
     def _parse_simple_request(self, prompt: str) -> dict:
         """Fallback parser for simple API requests"""
         # Extract URL
-        import re
         url_match = re.search(r'https?://[^\s]+', prompt)
         if not url_match:
             raise ValueError("No URL found in request")
@@ -97,23 +269,216 @@ class APIAgent:
         """Execute all tests in the plan"""
         results = []
         base_url = test_plan.get("base_url", "")
+        endpoints = test_plan.get("endpoints", [])
+        concurrency = max(1, int(test_plan.get("concurrency", self.max_concurrency)))
+        self._begin_run(len(endpoints))
+        
+        if concurrency > 1 and len(endpoints) > 1:
+            per_host_limit = test_plan.get("per_host_limit", self.per_host_limit)
+            return self._execute_concurrently(base_url, endpoints, concurrency, per_host_limit)
         
-        for endpoint in test_plan.get("endpoints", []):
+        for i, endpoint in enumerate(endpoints):
             result = self._test_endpoint(base_url, endpoint)
-            results.append(result)
+            results.append(self._record_result(i, result))
             
         return results
     
+    def _begin_run(self, total: int) -> None:
+        """Start a new run; test_results is reset to collect its records"""
+        self.test_results = []
+        self._run_total = total
+        self.run_id = self.result_store.new_run() if self.result_store is not None else None
+    
+    def _record_result(self, seq: int, result: dict):
+        """Persist a finished test right away and report progress.
+        
+        Returns what the run keeps in memory for the test: the full result
+        dict, or only its TestRecord once a result store holds the result.
+        """
+        if self.result_store is not None:
+            record = self.result_store.append(self.run_id, seq, result)
+        else:
+            record = TestRecord.from_result(self.run_id, seq, result)
+        self.test_results.append(record)
+        if self.progress_callback is not None:
+            self.progress_callback(len(self.test_results), self._run_total, record)
+        return record if self.result_store is not None else result
+    
+    def _execute_concurrently(self, base_url: str, endpoints: list, concurrency: int,
+                              per_host_limit=None, results=None) -> list:
+        """Run endpoints on a bounded thread pool, honouring dependency hints.
+        
+        Results are returned in plan order regardless of completion order.
+        Entries already present in `results` count as done and are not rerun.
+        """
+        deps = self._resolve_dependencies(endpoints)
+        hosts = [urlsplit(self._build_url(base_url, e)).netloc for e in endpoints]
+        results = list(results) if results is not None else [None] * len(endpoints)
+        completed = {i for i, result in enumerate(results) if result is not None}
+        pending = [i for i in range(len(endpoints)) if i not in completed]
+        in_flight = {}
+        host_load = defaultdict(int)
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while pending or in_flight:
+                # Schedule everything that is unblocked and within its limits
+                for i in list(pending):
+                    if len(in_flight) >= concurrency:
+                        break
+                    if not deps[i] <= completed:
+                        continue
+                    if per_host_limit and host_load[hosts[i]] >= per_host_limit:
+                        continue
+                    pending.remove(i)
+                    host_load[hosts[i]] += 1
+                    in_flight[pool.submit(self._test_endpoint, base_url, endpoints[i])] = i
+                
+                if not in_flight:
+                    raise ValueError("Test plan has circular endpoint dependencies")
+                
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = in_flight.pop(future)
+                    results[i] = self._record_result(i, future.result())
+                    completed.add(i)
+                    host_load[hosts[i]] -= 1
+        
+        return results
+    
+    def _resolve_dependencies(self, endpoints: list) -> list:
+        """Turn 'depends_on' / 'sequential' hints into sets of endpoint indices.
+        
+        'depends_on' accepts endpoint names or plan indices; 'sequential': true
+        makes an endpoint wait for every endpoint listed before it.
+        """
+        by_name = {}
+        for i, endpoint in enumerate(endpoints):
+            by_name.setdefault(endpoint.get("name"), i)
+        
+        deps = []
+        for i, endpoint in enumerate(endpoints):
+            required = set(range(i)) if endpoint.get("sequential") else set()
+            depends_on = endpoint.get("depends_on") or []
+            if isinstance(depends_on, (str, int)):
+                depends_on = [depends_on]
+            for ref in depends_on:
+                if isinstance(ref, int) and 0 <= ref < len(endpoints):
+                    required.add(ref)
+                elif ref in by_name:
+                    required.add(by_name[ref])
+                else:
+                    raise ValueError(f"Unknown dependency '{ref}' for endpoint '{endpoint.get('name')}'")
+            required.discard(i)
+            deps.append(required)
+        return deps
+    
+    def _build_url(self, base_url: str, endpoint: dict) -> str:
+        """Join the plan base URL with an endpoint path"""
+        url = endpoint["path"]
+        if base_url and not url.startswith("http"):
+            url = base_url.rstrip("/") + "/" + url.lstrip("/")
+        return url
+    
     def _test_endpoint(self, base_url: str, endpoint: dict) -> dict:
         """Test a single API endpoint"""
         start_time = time.time()
         
         # Build full URL
-        url = endpoint["path"]
-        if base_url and not url.startswith("http"):
-            url = base_url.rstrip("/") + "/" + url.lstrip("/")
+        url = self._build_url(base_url, endpoint)
+        test_result = self._new_result(endpoint, url)
         
-        test_result = {
+        try:
+            capture_limit = endpoint.get("capture_limit", self.capture_limit)
+            
+            if self.http_mode == "replay":
+                # Served from the cassette store: no network, so no retries or circuit breaking
+                response = self._replay(endpoint, url)
+            else:
+                # Make the request (timeouts, retries and circuit breaking come from the policy)
+                response = self.policy.send(
+                    endpoint["method"],
+                    url,
+                    lambda timeout: self._send(endpoint, url, timeout, stream=capture_limit is not None),
+                    test_result["attempts"],
+                    retry_on=(requests.ConnectionError, requests.Timeout),
+                    expected_status=endpoint.get("expected_status", 200)
+                )
+            
+            if capture_limit is not None:
+                response = self._capture_body(response, endpoint, capture_limit)
+                test_result.update(response.summary())
+            
+            test_result["response_time"] = round((time.time() - start_time) * 1000, 2)
+            self._check_response(test_result, endpoint, response)
+            
+            if endpoint.get("load") and self.http_mode != "replay":
+                self._run_load_test(test_result, endpoint)
+            
+        except Exception as e:
+            test_result["response_time"] = round((time.time() - start_time) * 1000, 2)
+            test_result["errors"].append(str(e))
+        
+        return test_result
+    
+    def _replay(self, endpoint: dict, url: str):
+        """The recorded response for a request; LookupError if there is none"""
+        method = endpoint["method"]
+        data = endpoint.get("data") if endpoint.get("data") else None
+        recorded = self.cassettes.get(request_key(method, url, data))
+        if recorded is None:
+            raise LookupError(f"No recorded response for {method} {url}")
+        return recorded
+    
+    def _send(self, endpoint: dict, url: str, timeout, stream=False):
+        """Issue one live request (live / record mode)"""
+        method = endpoint["method"]
+        data = endpoint.get("data") if endpoint.get("data") else None
+        key = request_key(method, url, data)
+        
+        headers = dict(endpoint.get("headers", {}))
+        store = self.cassettes is not None and (self.http_mode == "record" or self.conditional_requests)
+        etag = self.cassettes.etag(key) if store and self.conditional_requests else None
+        if etag:
+            headers.setdefault("If-None-Match", etag)
+        
+        # Responses that go into the store are read in full, so they are not streamed
+        response = self.session.request(
+            method=method,
+            url=url,
+            headers=headers,
+            json=data,
+            timeout=timeout,
+            stream=stream and not store
+        )
+        
+        if etag and response.status_code == 304:
+            # Unchanged since it was stored: serve the stored body
+            response.close()
+            return self.cassettes.get(key)
+        if self.http_mode == "record" or (store and response.status_code == 200 and response.headers.get("ETag")):
+            self.cassettes.put(key, method, url, response)
+        return response
+    
+    def _capture_body(self, response, endpoint: dict, limit: int) -> BodyCapture:
+        """Read a streamed response in chunks, validating as it goes"""
+        capture = BodyCapture(
+            response.status_code,
+            limit,
+            encoding=response.encoding,
+            spill_dir=endpoint.get("spill_dir", self.spill_dir),
+            validator=self._rule_set(endpoint).streaming_validator()
+        )
+        try:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                capture.feed(chunk)
+        finally:
+            capture.finish()
+            response.close()
+        return capture
+    
+    def _new_result(self, endpoint: dict, url: str) -> dict:
+        """Create an empty (failed) result record for an endpoint"""
+        return {
             "name": endpoint["name"],
             "method": endpoint["method"],
             "url": url,
@@ -123,113 +488,173 @@ class APIAgent:
             "status_code": None,
             "response_data": None,
             "validations": [],
-            "errors": []
+            "errors": [],
+            "attempts": []
         }
+    
+    def _check_response(self, test_result: dict, endpoint: dict, response) -> None:
+        """Record status, body and validation outcomes for a response.
+        
+        `response` only needs `status_code`, `text` and `json()`, so buffered
+        responses from other HTTP clients can be checked the same way.
+        """
+        test_result["status_code"] = response.status_code
         
+        # Parse response
         try:
-            # Make the request
-            response = self.session.request(
-                method=endpoint["method"],
-                url=url,
-                headers=endpoint.get("headers", {}),
-                json=endpoint.get("data") if endpoint.get("data") else None,
-                timeout=30
-            )
-            
-            test_result["response_time"] = round((time.time() - start_time) * 1000, 2)
-            test_result["status_code"] = response.status_code
-            
-            # Parse response
-            try:
-                test_result["response_data"] = response.json()
-            except:
-                test_result["response_data"] = response.text
-            
-            # Validate status code
-            expected_status = endpoint.get("expected_status", 200)
-            if response.status_code == expected_status:
-                test_result["validations"].append(f"✅ Status code {response.status_code} matches expected")
-            else:
-                test_result["validations"].append(f"❌ Status code {response.status_code}, expected {expected_status}")
-                test_result["errors"].append(f"Unexpected status code: {response.status_code}")
-            
-            # Run custom validations
-            for validation in endpoint.get("validations", []):
-                validation_result = self._validate_response(response, validation)
-                test_result["validations"].append(validation_result)
-            
-            # Determine overall status
-            if not test_result["errors"] and all("✅" in v for v in test_result["validations"]):
-                test_result["status"] = "PASSED"
-            
-        except Exception as e:
-            test_result["response_time"] = round((time.time() - start_time) * 1000, 2)
-            test_result["errors"].append(str(e))
+            test_result["response_data"] = response.json()
+        except:
+            test_result["response_data"] = response.text
         
-        return test_result
+        # Validate status code
+        expected_status = endpoint.get("expected_status", 200)
+        if response.status_code == expected_status:
+            test_result["validations"].append(f"✅ Status code {response.status_code} matches expected")
+        else:
+            test_result["validations"].append(f"❌ Status code {response.status_code}, expected {expected_status}")
+            test_result["errors"].append(f"Unexpected status code: {response.status_code}")
+        
+        # Run custom validations (captured bodies were already scanned in full)
+        rule_set = self._rule_set(endpoint)
+        if isinstance(response, BodyCapture):
+            found = response.validator.found if response.validator is not None else None
+            messages = rule_set.evaluate(response, test_result["response_time"], found=found,
+                                         truncated=response.truncated)
+        else:
+            messages = rule_set.evaluate(response, test_result["response_time"])
+        test_result["validations"].extend(messages)
+        
+        # Determine overall status
+        if not test_result["errors"] and all("✅" in v for v in test_result["validations"]):
+            test_result["status"] = "PASSED"
     
-    def _validate_response(self, response, validation: str) -> str:
-        """Validate response against a validation rule"""
-        try:
-            response_text = response.text.lower()
-            validation_lower = validation.lower()
-            
-            if "contain" in validation_lower:
-                # Extract what should be contained
-                import re
-                match = re.search(r'contain[s]?\s+["\']?([^"\'\n]+)["\']?', validation_lower)
-                if match:
-                    expected = match.group(1).strip()
-                    if expected in response_text:
-                        return f"✅ Response contains '{expected}'"
-                    else:
-                        return f"❌ Response does not contain '{expected}'"
-            
-            elif "status" in validation_lower and "should be" in validation_lower:
-                # Status validation already handled above
-                return f"✅ Status validation completed"
-            
+    def _rule_set(self, endpoint: dict) -> RuleSet:
+        """Compiled validations for an endpoint, built once per distinct rule list"""
+        validations = endpoint.get("validations", [])
+        key = json.dumps(validations, sort_keys=True, default=str)
+        rule_set = self._rule_sets.get(key)
+        if rule_set is None:
+            rule_set = self._rule_sets[key] = RuleSet(validations)
+        return rule_set
+    
+    def _run_load_test(self, test_result: dict, endpoint: dict) -> None:
+        """Fire the endpoint under load and check optional latency/error thresholds.
+        
+        The endpoint's 'load' block takes requests/duration/rps/concurrency plus
+        optional 'max_p99_ms' and 'max_error_rate' limits.
+        """
+        load = endpoint["load"]
+        stats = run_load(
+            self.session,
+            endpoint["method"],
+            test_result["url"],
+            load,
+            expected_status=endpoint.get("expected_status", 200),
+            headers=endpoint.get("headers", {}),
+            json=endpoint.get("data") if endpoint.get("data") else None
+        )
+        test_result["load"] = stats
+        
+        max_p99 = load.get("max_p99_ms")
+        if max_p99 is not None:
+            p99 = stats["latency_ms"]["p99"]
+            if p99 <= max_p99:
+                test_result["validations"].append(f"✅ Load p99 {p99}ms within {max_p99}ms")
             else:
-                # Generic validation
-                return f"✅ Validation: {validation}"
-                
-        except Exception as e:
-            return f"❌ Validation failed: {validation} - {str(e)}"
+                test_result["validations"].append(f"❌ Load p99 {p99}ms exceeds {max_p99}ms")
+                test_result["errors"].append(f"p99 latency regression: {p99}ms")
+        
+        max_error_rate = load.get("max_error_rate")
+        if max_error_rate is not None:
+            error_rate = stats["error_rate"]
+            if error_rate <= max_error_rate:
+                test_result["validations"].append(f"✅ Load error rate {error_rate:.2%} within {max_error_rate:.2%}")
+            else:
+                test_result["validations"].append(f"❌ Load error rate {error_rate:.2%} exceeds {max_error_rate:.2%}")
+                test_result["errors"].append(f"Error rate under load: {error_rate:.2%}")
+        
+        if test_result["errors"]:
+            test_result["status"] = "FAILED"
     
     def _generate_report(self, results: list) -> str:
-        """Generate a comprehensive test report"""
+        """Generate a comprehensive test report
+        
+        With a result store the full results stay there: the report is the
+        summary plus where to find the run (stream it with iter_report()).
+        """
+        if self.result_store is not None:
+            total_tests, passed_tests = self.result_store.counts(self.run_id)
+            lines = list(self._report_lines((), total_tests, passed_tests))
+            lines.append(f"📁 Full results: run {self.run_id} in {self.result_store.path} (see iter_report())")
+            return "\n".join(lines)
         total_tests = len(results)
         passed_tests = sum(1 for r in results if r["status"] == "PASSED")
+        return "\n".join(self._report_lines(results, total_tests, passed_tests))
+    
+    def iter_report(self, fmt="text", run_id=None):
+        """Stream the report of a stored run as 'text', 'json' or 'junit' chunks"""
+        if self.result_store is None:
+            raise ValueError("No result store configured")
+        run_id = run_id or self.run_id
+        if fmt == "json":
+            return render_json(self.result_store, run_id)
+        if fmt == "junit":
+            return render_junit(self.result_store, run_id)
+        if fmt != "text":
+            raise ValueError(f"Unknown report format: {fmt}")
+        total_tests, passed_tests = self.result_store.counts(run_id)
+        lines = self._report_lines(self.result_store.iter_results(run_id), total_tests, passed_tests)
+        return (line + "\n" for line in lines)
+    
+    def _report_lines(self, results, total_tests: int, passed_tests: int):
+        """Yield text report lines; `results` may be any iterable in plan order"""
         failed_tests = total_tests - passed_tests
         
-        report = []
-        report.append("🧪 API AUTOMATION TEST REPORT")
-        report.append("=" * 40)
-        report.append(f"📊 Summary: {passed_tests}/{total_tests} tests passed")
-        report.append(f"✅ Passed: {passed_tests}")
-        report.append(f"❌ Failed: {failed_tests}")
-        report.append("")
+        yield "🧪 API AUTOMATION TEST REPORT"
+        yield "=" * 40
+        yield f"📊 Summary: {passed_tests}/{total_tests} tests passed"
+        yield f"✅ Passed: {passed_tests}"
+        yield f"❌ Failed: {failed_tests}"
+        yield ""
         
         for i, result in enumerate(results, 1):
             status_icon = "✅" if result["status"] == "PASSED" else "❌"
-            report.append(f"{status_icon} Test {i}: {result['name']}")
-            report.append(f"   Method: {result['method']} {result['url']}")
-            report.append(f"   Status: {result['status_code']} ({result['response_time']}ms)")
+            yield f"{status_icon} Test {i}: {result['name']}"
+            yield f"   Method: {result['method']} {result['url']}"
+            yield f"   Status: {result['status_code']} ({result['response_time']}ms)"
+            
+            if len(result.get("attempts") or []) > 1:
+                timings = ", ".join(
+                    f"{a.get('status_code', 'error')} in {a['elapsed_ms']}ms" for a in result["attempts"]
+                )
+                yield f"   Attempts: {len(result['attempts'])} ({timings})"
             
             if result["validations"]:
-                report.append("   Validations:")
+                yield "   Validations:"
                 for validation in result["validations"]:
-                    report.append(f"     {validation}")
+                    yield f"     {validation}"
+            
+            if result.get("load"):
+                load = result["load"]
+                latency = load["latency_ms"]
+                yield (f"   Load: {load['requests']} requests in {load['duration_s']}s "
+                       f"({load['throughput_rps']} req/s, {load['error_rate']:.2%} errors)")
+                yield (f"     p50 {latency['p50']}ms | p90 {latency['p90']}ms | "
+                       f"p99 {latency['p99']}ms | max {latency['max']}ms")
+                if load.get("service_time_ms"):
+                    # At a fixed rate the figures above include queueing; this is the server alone
+                    service = load["service_time_ms"]
+                    yield f"     service time: p50 {service['p50']}ms | p99 {service['p99']}ms"
+                for upper, count in load["histogram_ms"]:
+                    yield f"     <= {upper}ms: {count}"
             
             if result["errors"]:
-                report.append("   Errors:")
+                yield "   Errors:"
                 for error in result["errors"]:
-                    report.append(f"     ❌ {error}")
+                    yield f"     ❌ {error}"
             
-            report.append("")
-        
-        return "\n".join(report)
+            yield ""
     
     def get_test_results(self):
-        """Get detailed test results"""
+        """Get detailed test results (records of the latest run, in completion order)"""
         return self.test_results
\ No newline at end of file
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import time
+import weakref
+from urllib.parse import urlsplit
+import aiohttp
+from agents.api_agent import APIAgent
+from agents.cassette import CassetteResponse, request_key
+
+# Connection pool tuning for the shared aiohttp client
+POOL_LIMIT = 100
+POOL_LIMIT_PER_HOST = 10
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 30
+REQUEST_TIMEOUT = 30
+
+# aiohttp sessions are bound to the loop that created them, so keep one per loop
+_sessions = weakref.WeakKeyDictionary()
+
+
+def get_client_session() -> aiohttp.ClientSession:
+    """Return the shared, pooled aiohttp session for the running event loop"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_LIMIT,
+            limit_per_host=POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+        _sessions[loop] = session
+    return session
+
+
+async def close_client_session():
+    """Close the shared session of the running event loop (call on shutdown)"""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+class _BufferedResponse:
+    """Minimal requests-like view over a fully read aiohttp response"""
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncAPIAgent(APIAgent):
+    """APIAgent variant that runs on the event loop through a pooled aiohttp client"""
+
+    def __init__(self, temperature=0.7, max_concurrency=10, per_host_limit=None, **options):
+        super().__init__(temperature=temperature, per_host_limit=per_host_limit, **options)
+        self.max_concurrency = max(1, int(max_concurrency))
+
+    async def arun_task(self, prompt: str) -> str:
+        """Async entry point for API testing tasks"""
+        try:
+            # Plan cache reads and LLM planning are synchronous, keep them off the loop
+            test_plan = (await asyncio.to_thread(self._cached_plan, prompt)
+                         or await asyncio.to_thread(self._generate_test_plan, prompt))
+            results = await self._aexecute_test_plan(test_plan)
+            return self._generate_report(results)
+
+        except Exception as e:
+            return f"API testing failed: {str(e)}"
+
+    async def arun_plan(self, test_plan: dict) -> str:
+        """Execute an already structured test plan and return the report"""
+        try:
+            results = await self._aexecute_test_plan(test_plan)
+            return self._generate_report(results)
+
+        except Exception as e:
+            return f"API testing failed: {str(e)}"
+
+    async def _aexecute_test_plan(self, test_plan: dict) -> list:
+        """Execute all tests in the plan concurrently, results in plan order"""
+        base_url = test_plan.get("base_url", "")
+        endpoints = test_plan.get("endpoints", [])
+        concurrency = max(1, int(test_plan.get("concurrency", self.max_concurrency)))
+        per_host_limit = test_plan.get("per_host_limit", self.per_host_limit)
+
+        deps = self._resolve_dependencies(endpoints)
+        self._check_acyclic(deps)
+        self._begin_run(len(endpoints))
+
+        session = get_client_session()
+        limiter = asyncio.Semaphore(concurrency)
+        host_limiters = {}
+        tasks = []
+
+        async def run(i, endpoint):
+            await asyncio.gather(*(tasks[d] for d in deps[i]))
+            host = urlsplit(self._build_url(base_url, endpoint)).netloc
+            if per_host_limit and host not in host_limiters:
+                host_limiters[host] = asyncio.Semaphore(per_host_limit)
+            async with limiter:
+                if per_host_limit:
+                    async with host_limiters[host]:
+                        result = await self._atest_endpoint(session, base_url, endpoint)
+                else:
+                    result = await self._atest_endpoint(session, base_url, endpoint)
+            return self._record_result(i, result)
+
+        for i, endpoint in enumerate(endpoints):
+            tasks.append(asyncio.ensure_future(run(i, endpoint)))
+        return list(await asyncio.gather(*tasks))
+
+    def _check_acyclic(self, deps: list) -> None:
+        """Reject dependency cycles up front; awaiting them would hang forever"""
+        remaining = {i: set(d) for i, d in enumerate(deps)}
+        while remaining:
+            ready = [i for i, d in remaining.items() if not d]
+            if not ready:
+                raise ValueError("Test plan has circular endpoint dependencies")
+            for i in ready:
+                del remaining[i]
+            for d in remaining.values():
+                d.difference_update(ready)
+
+    async def _atest_endpoint(self, session: aiohttp.ClientSession, base_url: str, endpoint: dict) -> dict:
+        """Test a single API endpoint without blocking the event loop"""
+        start_time = time.time()
+        url = self._build_url(base_url, endpoint)
+        test_result = self._new_result(endpoint, url)
+
+        method = endpoint["method"]
+        data = endpoint.get("data") if endpoint.get("data") else None
+        key = request_key(method, url, data)
+
+        async def send(timeout):
+            async with session.request(
+                method,
+                url,
+                headers=endpoint.get("headers", {}),
+                json=data,
+                timeout=aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1]),
+            ) as response:
+                body = await response.read()
+                if self.http_mode == "record":
+                    recorded = CassetteResponse(response.status, dict(response.headers), body, response.charset)
+                    self.cassettes.put(key, method, url, recorded)
+                return _BufferedResponse(response.status, await response.text(errors="replace"))
+
+        try:
+            if self.http_mode == "replay":
+                # Served from the cassette store: no network, so no retries or circuit breaking
+                recorded = self._replay(endpoint, url)
+                response = _BufferedResponse(recorded.status_code, recorded.text)
+            else:
+                response = await self.policy.asend(
+                    endpoint["method"],
+                    url,
+                    send,
+                    test_result["attempts"],
+                    retry_on=(aiohttp.ClientConnectionError, asyncio.TimeoutError),
+                    expected_status=endpoint.get("expected_status", 200)
+                )
+
+            test_result["response_time"] = round((time.time() - start_time) * 1000, 2)
+            self._check_response(test_result, endpoint, response)
+
+            if endpoint.get("load") and self.http_mode != "replay":
+                # The load generator paces its own worker threads
+                await asyncio.to_thread(self._run_load_test, test_result, endpoint)
+
+        except Exception as e:
+            test_result["response_time"] = round((time.time() - start_time) * 1000, 2)
+            test_result["errors"].append(str(e) or type(e).__name__)
+
+        return test_result
@@ -0,0 +1,75 @@
+import codecs
+import hashlib
+import json
+import os
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class BodyCapture:
+    """Consumes a response body chunk by chunk in constant memory.
+
+    Keeps the first `limit` bytes, a SHA-256 digest and the total size, feeds
+    decoded text to an optional streaming validator and, with `spill_dir`,
+    writes the full body to a temp file. Exposes `status_code`, `text` and
+    `json()` so it can stand in for a response when checking results.
+    """
+
+    def __init__(self, status_code: int, limit: int, encoding=None, spill_dir=None, validator=None):
+        self.status_code = status_code
+        self.limit = limit
+        self.encoding = encoding or "utf-8"
+        self.size = 0
+        self.validator = validator
+        self.spill_path = None
+        self._prefix = bytearray()
+        self._digest = hashlib.sha256()
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        self._spill = None
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            fd, self.spill_path = tempfile.mkstemp(prefix="api_body_", suffix=".bin", dir=spill_dir)
+            self._spill = os.fdopen(fd, "wb")
+
+    def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        self._digest.update(chunk)
+        if len(self._prefix) < self.limit:
+            self._prefix += chunk[:self.limit - len(self._prefix)]
+        if self._spill is not None:
+            self._spill.write(chunk)
+        if self.validator is not None:
+            self.validator.feed(self._decoder.decode(chunk))
+
+    def finish(self) -> None:
+        if self.validator is not None:
+            self.validator.feed(self._decoder.decode(b"", final=True))
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    @property
+    def truncated(self) -> bool:
+        return self.size > self.limit
+
+    @property
+    def digest(self) -> str:
+        return self._digest.hexdigest()
+
+    @property
+    def text(self) -> str:
+        return self._prefix.decode(self.encoding, errors="replace")
+
+    def json(self):
+        if self.truncated:
+            raise ValueError(f"Body truncated at {self.limit} bytes")
+        return json.loads(self.text)
+
+    def summary(self) -> dict:
+        return {
+            "response_size": self.size,
+            "response_digest": f"sha256:{self.digest}",
+            "response_truncated": self.truncated,
+            "response_file": self.spill_path,
+        }
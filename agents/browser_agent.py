@@ -1,53 +1,78 @@
-import asyncio
-from playwright.async_api import async_playwright
+from agents.browser_pool import get_browser_pool, release_browser_pool
 import os
 
 class BrowserAgent:
-    def __init__(self, enable_media_permissions=True, y4m_file_path=None):
+    def __init__(self, enable_media_permissions=True, y4m_file_path=None, pool=None, pool_size=1, headless=False,
+                 pool_options=None):
         self.y4m_file_path = y4m_file_path or "/Users/pratik/Downloads/Assesment/mcp_ai_testAgent/Johnny_1280x720_60.y4m"
+        self.enable_media_permissions = enable_media_permissions
         self.live_logs = []
-        self.browser = None
+        # Warm browsers shared by every task; started on the first run_task
+        self.pool = pool
+        # True while this agent holds a handle on a shared pool (a pool passed in stays the caller's)
+        self._shared_pool = False
+        self.pool_size = pool_size
+        self.headless = headless
+        # Extra BrowserPool settings, e.g. max_tasks or max_memory_mb for recycling
+        self.pool_options = pool_options or {}
         self.page = None
-    
+
+    def _browser_args(self):
+        # Browser args for Y4M bypass
+        return [
+            "--use-fake-ui-for-media-stream",
+            "--use-fake-device-for-media-stream",
+            f"--use-file-for-fake-video-capture={self.y4m_file_path}",
+            "--disable-web-security",
+            "--autoplay-policy=no-user-gesture-required"
+        ]
+
+    def _get_pool(self):
+        if self.pool is None:
+            self.pool = get_browser_pool(self._browser_args(), headless=self.headless, size=self.pool_size,
+                                         **self.pool_options)
+            self._shared_pool = True
+        return self.pool
+
     def run_task(self, prompt):
         try:
-            return asyncio.run(self._run_task(prompt))
+            context_options = {"permissions": ["camera", "microphone"]} if self.enable_media_permissions else {}
+            return self._get_pool().run(lambda context: self._run_task(context, prompt), context_options)
         except Exception as e:
             return f"Error: {str(e)}"
-    
-    async def _run_task(self, prompt):
+
+    async def _run_task(self, context, prompt):
+        # `context` is a fresh, isolated context on a warm pooled browser; the pool closes it afterwards
         try:
-            # Browser args for Y4M bypass
-            args = [
-                "--use-fake-ui-for-media-stream",
-                "--use-fake-device-for-media-stream",
-                f"--use-file-for-fake-video-capture={self.y4m_file_path}",
-                "--disable-web-security",
-                "--autoplay-policy=no-user-gesture-required"
-            ]
-            
-            async with async_playwright() as p:
-                self.browser = await p.chromium.launch(headless=False, args=args)
-                context = await self.browser.new_context(permissions=["camera", "microphone"])
-                self.page = await context.new_page()
-                
-                # Simple task execution
-                if "vmock" in prompt.lower():
-                    await self.page.goto("https://www.vmock.com/login")
-                    await self.page.wait_for_timeout(2000)
-                    return "✅ VMock page loaded with Y4M camera bypass active"
-                else:
-                    return f"✅ Task completed: {prompt}"
-                    
+            self.page = await context.new_page()
+
+            # Simple task execution
+            if "vmock" in prompt.lower():
+                await self.page.goto("https://www.vmock.com/login")
+                await self.page.wait_for_timeout(2000)
+                return "✅ VMock page loaded with Y4M camera bypass active"
+            else:
+                return f"✅ Task completed: {prompt}"
+
         except Exception as e:
             return f"❌ Task failed: {str(e)}"
-    
+        finally:
+            self.page = None
+
     def get_live_logs(self):
         return self.live_logs
-    
+
     def close_browser(self):
-        if self.browser:
+        """Release this agent's hold on its browser pool.
+
+        A shared pool stays up while other agents still use it; the next task
+        takes a fresh handle.
+        """
+        if self.pool:
             try:
-                asyncio.run(self.browser.close())
-            except:
-                pass
\ No newline at end of file
+                if self._shared_pool:
+                    release_browser_pool(self.pool)
+            except Exception:
+                pass
+            self.pool = None
+            self._shared_pool = False
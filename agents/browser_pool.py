@@ -0,0 +1,229 @@
+import asyncio
+import atexit
+import threading
+
+from playwright.async_api import async_playwright
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DEFAULT_POOL_SIZE = 1
+MAX_TASKS_PER_BROWSER = 50
+
+
+def _browser_processes() -> set:
+    """PIDs of Chromium processes under this process (needs psutil)"""
+    if psutil is None:
+        return set()
+    return {p.pid for p in psutil.Process().children(recursive=True) if "chrom" in p.name().lower()}
+
+
+def _rss_mb(pids: set) -> float:
+    """RSS of `pids` and everything they have spawned since (renderers come and go per context)"""
+    processes = {}
+    for pid in pids:
+        try:
+            process = psutil.Process(pid)
+            processes[pid] = process
+            processes.update((child.pid, child) for child in process.children(recursive=True))
+        except psutil.Error:
+            pass
+    total = 0
+    for process in processes.values():
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+
+class _PooledBrowser:
+    def __init__(self, browser, pids: set):
+        self.browser = browser
+        self.pids = pids
+        self.tasks = 0
+
+
+class BrowserPool:
+    """Warm Chromium instances driven from one dedicated event-loop thread.
+
+    Callers on any thread hand in `async fn(context)`; it runs in a fresh,
+    isolated BrowserContext on an idle browser, so per-task cost is context
+    creation rather than a browser launch. A browser is relaunched when it
+    has disconnected, after `max_tasks` tasks, or (with psutil installed)
+    once its processes use more than `max_memory_mb`.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, launch_args=None, headless=True, max_tasks=MAX_TASKS_PER_BROWSER,
+                 max_memory_mb=None, context_options=None):
+        self.size = size
+        self.launch_args = list(launch_args or [])
+        self.headless = headless
+        self.max_tasks = max_tasks
+        self.max_memory_mb = max_memory_mb
+        self.context_options = dict(context_options or {})
+        self.recycled = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="browser-pool", daemon=True)
+        self._thread.start()
+        self._playwright = None
+        self._idle = None
+        self._closed = False
+        # Launch the browsers up front so the first task is already warm
+        try:
+            self._call(self._start())
+        except BaseException:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=10)
+            raise
+
+    def _call(self, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    async def _start(self):
+        self._playwright = await async_playwright().start()
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            self._idle.put_nowait(await self._launch())
+
+    async def _launch(self) -> _PooledBrowser:
+        before = _browser_processes()
+        browser = await self._playwright.chromium.launch(headless=self.headless, args=self.launch_args)
+        return _PooledBrowser(browser, _browser_processes() - before)
+
+    def _healthy(self, pooled: _PooledBrowser) -> bool:
+        if not pooled.browser.is_connected():
+            return False
+        if pooled.tasks >= self.max_tasks:
+            return False
+        if self.max_memory_mb and pooled.pids and _rss_mb(pooled.pids) > self.max_memory_mb:
+            return False
+        return True
+
+    async def _recycle(self, pooled: _PooledBrowser) -> _PooledBrowser:
+        self.recycled += 1
+        try:
+            await pooled.browser.close()
+        except Exception:
+            pass
+        return await self._launch()
+
+    async def _run(self, fn, context_options):
+        pooled = await self._idle.get()
+        try:
+            if not pooled.browser.is_connected():
+                pooled = await self._recycle(pooled)
+            context = await pooled.browser.new_context(**{**self.context_options, **(context_options or {})})
+            try:
+                return await fn(context)
+            finally:
+                pooled.tasks += 1
+                await context.close()
+        finally:
+            if not self._healthy(pooled):
+                try:
+                    pooled = await self._recycle(pooled)
+                except Exception:
+                    # Leave the slot to be relaunched by the next task's health check
+                    pass
+            self._idle.put_nowait(pooled)
+
+    def submit(self, fn, context_options=None):
+        """Schedule `async fn(context)`; returns a concurrent.futures.Future"""
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        return asyncio.run_coroutine_threadsafe(self._run(fn, context_options), self._loop)
+
+    def run(self, fn, context_options=None, timeout=None):
+        """Run `async fn(context)` on a pooled browser and return its result"""
+        return self.submit(fn, context_options).result(timeout)
+
+    def stats(self) -> dict:
+        return {"size": self.size, "idle": self._idle.qsize() if self._idle else 0, "recycled": self.recycled}
+
+    async def _shutdown(self):
+        while not self._idle.empty():
+            pooled = self._idle.get_nowait()
+            try:
+                await pooled.browser.close()
+            except Exception:
+                pass
+        await self._playwright.stop()
+
+    def close(self) -> None:
+        """Close the browsers (waiting for running tasks to hand theirs back) and stop the loop"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._call(self._drain(), timeout=60)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=10)
+
+    async def _drain(self):
+        # Wait until every browser is idle so none is closed mid-task
+        while self._idle.qsize() < self.size:
+            await asyncio.sleep(0.05)
+        await self._shutdown()
+
+
+_pools = {}
+# Handles held on each shared pool; the pool closes when the last one is released
+_refs = {}
+_pools_lock = threading.Lock()
+
+
+def get_browser_pool(launch_args=None, headless=True, size=DEFAULT_POOL_SIZE, **options) -> BrowserPool:
+    """Shared pool for a launch configuration (started on first use).
+
+    Every call takes a handle that must be given back with
+    release_browser_pool(). Callers asking for a different size or pool
+    options get a pool of their own.
+    """
+    key = (tuple(launch_args or ()), headless, size, repr(sorted(options.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = BrowserPool(size, launch_args, headless, **options)
+        _refs[pool] = _refs.get(pool, 0) + 1
+        return pool
+
+
+def release_browser_pool(pool: BrowserPool) -> None:
+    """Give back a handle from get_browser_pool(); closes the pool once nobody holds it"""
+    with _pools_lock:
+        remaining = _refs.get(pool, 1) - 1
+        if remaining > 0:
+            _refs[pool] = remaining
+            return
+        _refs.pop(pool, None)
+        for key, candidate in list(_pools.items()):
+            if candidate is pool:
+                del _pools[key]
+    pool.close()
+
+
+def close_browser_pool(pool: BrowserPool) -> None:
+    """Close a pool now, whoever else holds it"""
+    with _pools_lock:
+        _refs.pop(pool, None)
+        for key, candidate in list(_pools.items()):
+            if candidate is pool:
+                del _pools[key]
+    pool.close()
+
+
+def close_all_browser_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        _refs.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_all_browser_pools)
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+HTTP_MODES = ("live", "record", "replay")
+
+
+def request_key(method: str, url: str, data=None) -> str:
+    """Cassette index: method + URL + hash of the canonical JSON body"""
+    body = json.dumps(data, sort_keys=True, separators=(",", ":")) if data else ""
+    body_hash = hashlib.sha256(body.encode("utf-8")).hexdigest()
+    return f"{method.upper()} {url} {body_hash}"
+
+
+class CassetteResponse:
+    """Recorded response with the parts of the requests API the agent uses"""
+
+    def __init__(self, status_code: int, headers: dict, content: bytes, encoding=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size=64 * 1024):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class CassetteStore:
+    """SQLite-backed store of recorded request/response pairs"""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "cassettes.db")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cassettes ("
+            "key TEXT PRIMARY KEY, method TEXT, url TEXT, status_code INTEGER, "
+            "headers TEXT, encoding TEXT, body BLOB, etag TEXT, recorded_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status_code, headers, encoding, body FROM cassettes WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        status_code, headers, encoding, body = row
+        return CassetteResponse(status_code, json.loads(headers), bytes(body), encoding)
+
+    def etag(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT etag FROM cassettes WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, method: str, url: str, response) -> None:
+        etag = response.headers.get("ETag")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cassettes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, method.upper(), url, response.status_code, json.dumps(dict(response.headers)),
+                 response.encoding, response.content, etag, time.time())
+            )
+            self._conn.commit()
@@ -1,26 +1,84 @@
+import heapq
 import os
 import shutil
+import threading
+import time
+from itertools import islice
+from agents.file_copy import copy_tree
+from agents.file_hash import DEFAULT_ALGORITHM, HashIndex, find_duplicates, hash_file, hash_tree
+from agents.file_walk import scan, walk_key
+from agents.file_watch import DEBOUNCE, MAX_LATENCY, POLL_INTERVAL, awatch, watch
+from agents.prompt_parser import parse_batch, parse_prompt
+
+DEFAULT_PAGE_SIZE = 1000
+# How long a one-shot `watch` command collects events
+DEFAULT_WATCH_SECONDS = 10.0
+
+PROMPT_KEYS = ("command", "path", "destination", "pattern", "depth", "details", "workers", "page_size",
+               "cursor", "include_dirs", "compare", "algorithm", "recursive", "debounce", "poll_interval",
+               "backend", "duration", "max_events", "max_latency")
+# Commands that change files, so cached scans in a batch are stale afterwards
+MUTATING_COMMANDS = ("delete", "copy", "sync")
+
+# Options that switch `list` from a plain listdir to a scan
+WALK_OPTIONS = ("pattern", "depth", "details", "workers", "page_size", "cursor", "include_dirs")
+
+
+def _workers(task: dict):
+    # None lets the process pool use one worker per CPU
+    return int(task["workers"]) if "workers" in task else None
+
+
+def _flag(value) -> bool:
+    return value if isinstance(value, bool) else str(value).lower() in ("1", "true", "yes")
+
 
 class FileAgent:
-    def __init__(self, temperature=0.7):
+    def __init__(self, temperature=0.7, hash_index=None):
         self.temperature = temperature
+        # SQLite file of known digests; "" disables the index
+        self.hash_index = os.getenv("FILE_HASH_INDEX_PATH", ".file_hash_index.sqlite") if hash_index is None else hash_index
+        self._index = None
+        # Scan results shared by the items of a running batch
+        self._scan_cache = None
 
     def run(self, prompt: str) -> dict:
-        task = self._parse_prompt(prompt)
+        try:
+            tasks = parse_batch(prompt)
+            if tasks is not None:
+                return {"results": list(self.run_batch(tasks))}
+            task = self._parse_prompt(prompt)
+        except ValueError as e:
+            return {"error": str(e)}
         return self._handle(task)
 
+    def run_batch(self, tasks):
+        """Run tasks in order, yielding a result per task as it finishes.
+
+        Within a batch, list/walk items with the same path and options share
+        one directory scan (until an item modifies files). The last item
+        yielded is a summary: {"batch": "completed", "items": n, "errors": k}.
+        """
+        self._scan_cache = {}
+        count = errors = 0
+        try:
+            for index, task in enumerate(tasks):
+                result = self._handle(task)
+                count += 1
+                errors += "error" in result
+                yield {"index": index, **result}
+        finally:
+            self._scan_cache = None
+        yield {"batch": "completed", "items": count, "errors": errors}
+
     def _parse_prompt(self, prompt: str) -> dict:
         """
         Parses prompts like:
         'command=list path=./files' or 'command=copy path=a.txt destination=b.txt'
+        or a JSON object with the same keys. Values run until the next known
+        key, so paths may contain spaces.
         """
-        task = {}
-        parts = prompt.split()
-        for part in parts:
-            if '=' in part:
-                key, value = part.split('=', 1)
-                task[key.strip()] = value.strip()
-        return task
+        return parse_prompt(prompt, PROMPT_KEYS)
 
     def _handle(self, task: dict) -> dict:
         command = task.get("command")
@@ -28,13 +86,40 @@ class FileAgent:
 
         if not command or not path:
             return {"error": "Missing 'command' or 'path' in prompt."}
+        if command in MUTATING_COMMANDS and self._scan_cache:
+            self._scan_cache.clear()
 
         try:
-            if command == "list":
+            if command == "list" and not any(k in task for k in WALK_OPTIONS):
                 return {"files": os.listdir(path)}
+            elif command in ("list", "walk"):
+                return self._list(task)
             elif command == "delete":
                 os.remove(path)
                 return {"status": "deleted"}
+            elif command in ("copy", "sync") and (command == "sync" or os.path.isdir(path)):
+                dest = task.get("destination")
+                if not dest:
+                    return {"error": "Missing destination path."}
+                # sync skips files whose destination matches (by mtime unless told otherwise)
+                compare = task.get("compare", "mtime" if command == "sync" else None)
+                index = self._hash_index() if compare == "hash" else None
+                stats = copy_tree(path, dest, compare=compare, patterns=task.get("pattern"),
+                                  workers=int(task.get("workers", 8)), digest=index.digest if index else None)
+                return {"status": "copied" if command == "copy" else "synced", "stats": stats}
+            elif command == "watch":
+                return self._collect_events(task)
+            elif command == "hash":
+                return self._hash(task)
+            elif command == "dedupe":
+                stats = {}
+                started = time.perf_counter()
+                groups = find_duplicates(
+                    path, patterns=task.get("pattern"), algorithm=task.get("algorithm", DEFAULT_ALGORITHM),
+                    index=self._hash_index(), workers=_workers(task), stats=stats
+                )
+                stats["elapsed_s"] = round(time.perf_counter() - started, 3)
+                return {"duplicates": groups, "wasted_bytes": sum(g["wasted_bytes"] for g in groups), "stats": stats}
             elif command == "copy":
                 dest = task.get("destination")
                 if not dest:
@@ -45,3 +130,112 @@ class FileAgent:
                 return {"error": f"Unknown command: {command}"}
         except Exception as e:
             return {"error": str(e)}
+
+    def _hash_index(self):
+        if self._index is None and self.hash_index:
+            self._index = HashIndex(self.hash_index)
+        return self._index
+
+    def _hash(self, task: dict) -> dict:
+        path = task["path"]
+        algorithm = task.get("algorithm", DEFAULT_ALGORITHM)
+        index = self._hash_index()
+        if not os.path.isdir(path):
+            return {"path": path, "algorithm": algorithm, "digest": index.digest(path, algorithm) if index
+                    else hash_file(path, algorithm)}
+
+        stats = {}
+        started = time.perf_counter()
+        files, errors = [], []
+        for entry, digest, error in hash_tree(path, task.get("pattern"), algorithm, index, _workers(task), stats=stats):
+            if error:
+                errors.append(f"{entry.path}: {error}")
+            else:
+                files.append({"path": entry.path, "size": entry.size, "digest": digest})
+        stats["elapsed_s"] = round(time.perf_counter() - started, 3)
+        return {"algorithm": algorithm, "files": files, "errors": errors, "stats": stats}
+
+    def watch(self, task: dict, stop=None):
+        """Yield debounced change events for `path` until closed or `stop` is set"""
+        return watch(task["path"], stop=stop, **self._watch_options(task))
+
+    def awatch(self, task: dict):
+        """Async iterator over the same events; closing or cancelling it stops the watch"""
+        return awatch(task["path"], **self._watch_options(task))
+
+    @staticmethod
+    def _watch_options(task: dict) -> dict:
+        return dict(
+            recursive=_flag(task.get("recursive", True)),
+            patterns=task.get("pattern"),
+            debounce=float(task.get("debounce", DEBOUNCE)),
+            poll_interval=float(task.get("poll_interval", POLL_INTERVAL)),
+            backend=task.get("backend"),
+            max_latency=float(task.get("max_latency", MAX_LATENCY)),
+        )
+
+    def _collect_events(self, task: dict) -> dict:
+        """One-shot watch: events seen within `duration` seconds (or the first `max_events`)"""
+        duration = float(task.get("duration", DEFAULT_WATCH_SECONDS))
+        max_events = int(task["max_events"]) if "max_events" in task else None
+        stop = threading.Event()
+        timer = threading.Timer(duration, stop.set)
+        timer.start()
+        events = []
+        try:
+            for event in self.watch(task, stop=stop):
+                events.append(event)
+                if max_events is not None and len(events) >= max_events:
+                    break
+        finally:
+            timer.cancel()
+        return {"events": events}
+
+    def iter_files(self, task: dict, after=None):
+        """Yield entries for a list/walk task one at a time, optionally resuming past `after`"""
+        recursive = task.get("command") == "walk"
+        depth = task.get("depth")
+        options = dict(
+            patterns=task.get("pattern"),
+            max_depth=int(depth) if depth is not None else (None if recursive else 0),
+            include_dirs=_flag(task.get("include_dirs", False)),
+            with_stat=_flag(task.get("details", recursive)),
+            workers=int(task.get("workers", 1)),
+            after=after,
+        )
+        if self._scan_cache is None:
+            return scan(task["path"], **options)
+        key = (task["path"], *options.values())
+        if key not in self._scan_cache:
+            self._scan_cache[key] = list(scan(task["path"], **options))
+        return iter(self._scan_cache[key])
+
+    def _list(self, task: dict) -> dict:
+        """Entries for a list/walk task, a page at a time.
+
+        `cursor` is the token from the previous page: the last path it
+        returned. Pages follow walk_key() order and resume past the cursor
+        without re-reading the subtrees before it; a parallel scan
+        (`workers` > 1) keeps only the next page's worth of entries while
+        it runs. Without paging options a parallel scan returns everything
+        in one response.
+        """
+        details = _flag(task.get("details", task.get("command") == "walk"))
+        paged = "page_size" in task or task.get("cursor")
+        parallel = int(task.get("workers", 1)) > 1
+        if parallel and not paged:
+            return {"files": [entry.to_dict() if details else entry.path for entry in self.iter_files(task)],
+                    "next_cursor": None}
+
+        page_size = int(task.get("page_size", DEFAULT_PAGE_SIZE))
+        entries = self.iter_files(task, after=task.get("cursor") or None)
+        if parallel:
+            entries = heapq.nsmallest(page_size + 1, entries, key=lambda entry: walk_key(entry.path))
+        else:
+            entries = list(islice(entries, page_size + 1))
+        more = len(entries) > page_size
+        entries = entries[:page_size]
+        return {
+            "files": [entry.to_dict() if details else entry.path for entry in entries],
+            "next_cursor": entries[-1].path if more else None,
+        }
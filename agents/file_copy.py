@@ -0,0 +1,220 @@
+import errno
+import hashlib
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.file_walk import scan
+
+COMPARE_MODES = ("size", "mtime", "hash")
+CHUNK_SIZE = 1024 * 1024
+# Filesystems differ in timestamp granularity; treat mtimes this close as equal
+MTIME_TOLERANCE = 0.001
+
+# Errors meaning "this kernel/filesystem pair can't do that", so try the next method
+_UNSUPPORTED = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF}
+
+
+def _finished(copied: int, size: int) -> bool:
+    """Outcome of an in-kernel copy loop that stopped after `copied` of `size` bytes.
+
+    Nothing copied (procfs, sysfs and some FUSE/overlay mounts report 0
+    instead of an error) means try the next method; a short copy is an error.
+    """
+    if copied == 0:
+        return False
+    if copied < size:
+        raise OSError(errno.EIO, f"Short copy: {copied} of {size} bytes")
+    return True
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, size: int) -> bool:
+    if not hasattr(os, "copy_file_range"):
+        return False
+    copied = 0
+    try:
+        while copied < size:
+            n = os.copy_file_range(src_fd, dst_fd, size - copied)
+            if n == 0:
+                break
+            copied += n
+    except OSError as e:
+        if copied == 0 and e.errno in _UNSUPPORTED:
+            return False
+        raise
+    return _finished(copied, size)
+
+
+def _sendfile(src_fd: int, dst_fd: int, size: int) -> bool:
+    if not hasattr(os, "sendfile"):
+        return False
+    offset = 0
+    try:
+        while offset < size:
+            n = os.sendfile(dst_fd, src_fd, offset, size - offset)
+            if n == 0:
+                break
+            offset += n
+    except OSError as e:
+        if offset == 0 and e.errno in _UNSUPPORTED:
+            return False
+        raise
+    return _finished(offset, size)
+
+
+def copy_file(src: str, dst: str) -> str:
+    """Copy contents and metadata; returns the method used.
+
+    Tries copy_file_range (in-kernel, may reflink), then sendfile, then a
+    buffered copy. The source mtime is kept so later syncs can skip the file.
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        if size and _copy_file_range(fsrc.fileno(), fdst.fileno(), size):
+            method = "copy_file_range"
+        elif size and _sendfile(fsrc.fileno(), fdst.fileno(), size):
+            method = "sendfile"
+        else:
+            shutil.copyfileobj(fsrc, fdst, CHUNK_SIZE)
+            method = "buffered"
+    shutil.copystat(src, dst)
+    return method
+
+
+def copy_symlink(src: str, dst: str) -> str:
+    """Recreate the link `src` at `dst` (replacing what is there) rather than copying its target"""
+    link = os.readlink(src)
+    if os.path.lexists(dst):
+        os.remove(dst)
+    os.symlink(link, dst)
+    return "symlink"
+
+
+def _digest(path: str) -> str:
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def unchanged(src: str, dst: str, size: int, mtime: float, compare: str, digest=None) -> bool:
+    """Whether `dst` already matches a source of `size`/`mtime` under `compare`
+
+    `digest(path)` overrides how files are hashed, e.g. with a HashIndex lookup.
+    """
+    try:
+        st = os.stat(dst)
+    except OSError:
+        return False
+    if st.st_size != size:
+        return False
+    if compare == "size":
+        return True
+    if compare == "mtime":
+        return abs(st.st_mtime - mtime) <= MTIME_TOLERANCE
+    digest = digest or _digest
+    return digest(src) == digest(dst)
+
+
+class CopyStats:
+    """Counters for one bulk copy, safe to update from worker threads"""
+
+    def __init__(self):
+        self.copied = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.methods = {}
+        self.errors = []
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def add(self, size: int, method: str) -> None:
+        with self._lock:
+            self.copied += 1
+            self.bytes += size
+            self.methods[method] = self.methods.get(method, 0) + 1
+
+    def skip(self) -> None:
+        with self._lock:
+            self.skipped += 1
+
+    def fail(self, path: str, error: Exception) -> None:
+        with self._lock:
+            self.errors.append(f"{path}: {error}")
+
+    def to_dict(self) -> dict:
+        elapsed = time.perf_counter() - self._started
+        return {
+            "files_copied": self.copied,
+            "files_skipped": self.skipped,
+            "bytes_copied": self.bytes,
+            "elapsed_s": round(elapsed, 3),
+            "mb_per_s": round(self.bytes / 1e6 / elapsed, 2) if elapsed else None,
+            "files_per_s": round(self.copied / elapsed, 1) if elapsed else None,
+            "methods": self.methods,
+            "errors": self.errors,
+        }
+
+
+def copy_tree(src: str, dst: str, compare=None, patterns=None, workers=8, digest=None) -> dict:
+    """Copy the files under `src` into `dst`, in parallel; returns CopyStats as a dict.
+
+    With `compare` ('size', 'mtime' or 'hash') files whose destination
+    already matches are skipped, which turns a re-run into a cheap sync.
+    `digest` is passed on to unchanged() for the 'hash' mode. Symlinks are
+    recreated as links, not followed. A `src` that is a single file is
+    copied to `dst` (or into it, if `dst` is a directory).
+    """
+    if compare is not None and compare not in COMPARE_MODES:
+        raise ValueError(f"Unknown compare mode '{compare}' (expected one of {', '.join(COMPARE_MODES)})")
+    stats = CopyStats()
+    if not os.path.isdir(src):
+        st = os.lstat(src)
+        target = os.path.join(dst, os.path.basename(src)) if os.path.isdir(dst) else dst
+        if compare and not os.path.islink(src) and unchanged(src, target, st.st_size, st.st_mtime, compare, digest):
+            stats.skip()
+        else:
+            copy = copy_symlink if os.path.islink(src) else copy_file
+            stats.add(0 if os.path.islink(src) else st.st_size, copy(src, target))
+        return stats.to_dict()
+
+    made_dirs = set()
+    dirs_lock = threading.Lock()
+
+    def copy_one(entry):
+        source = os.path.join(src, entry.path)
+        target = os.path.join(dst, entry.path)
+        try:
+            if entry.type == "symlink":
+                if compare and os.path.islink(target) and os.readlink(target) == os.readlink(source):
+                    stats.skip()
+                    return
+            elif compare and unchanged(source, target, entry.size, entry.mtime, compare, digest):
+                stats.skip()
+                return
+            parent = os.path.dirname(target)
+            with dirs_lock:
+                if parent not in made_dirs:
+                    os.makedirs(parent, exist_ok=True)
+                    made_dirs.add(parent)
+            if entry.type == "symlink":
+                stats.add(0, copy_symlink(source, target))
+            else:
+                stats.add(entry.size or 0, copy_file(source, target))
+        except Exception as e:
+            stats.fail(entry.path, e)
+        finally:
+            slots.release()
+
+    os.makedirs(dst, exist_ok=True)
+    made_dirs.add(os.path.dirname(os.path.join(dst, "")))
+    # Bounded hand-off keeps memory flat however many files the walk yields
+    slots = threading.BoundedSemaphore(workers * 4)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="copy") as pool:
+        for entry in scan(src, patterns=patterns, with_stat=True):
+            slots.acquire()
+            pool.submit(copy_one, entry)
+    return stats.to_dict()
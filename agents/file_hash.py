@@ -0,0 +1,195 @@
+import hashlib
+import mmap
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from agents.file_walk import scan
+from agents.sqlite_pool import get_pool
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+DEFAULT_ALGORITHM = "blake2b"
+BUFFER_SIZE = 1024 * 1024
+# Files at least this big are hashed straight from a memory map
+MMAP_THRESHOLD = 4 * 1024 * 1024
+# Misses handed to the process pool per round, and per worker task
+HASH_BATCH = 1024
+HASH_CHUNKSIZE = 16
+
+
+def algorithms() -> tuple:
+    names = ("blake2b", "blake2s", "sha256")
+    return names + (("xxh64", "xxh3_128") if xxhash is not None else ())
+
+
+def _new_digest(algorithm: str):
+    if algorithm.startswith("xxh"):
+        if xxhash is None:
+            raise ImportError(f"{algorithm} requires xxhash (pip install xxhash)")
+        return getattr(xxhash, algorithm)()
+    if algorithm not in algorithms():
+        raise ValueError(f"Unknown hash algorithm '{algorithm}' (expected one of {', '.join(algorithms())})")
+    return hashlib.new(algorithm)
+
+
+def hash_file(path: str, algorithm=DEFAULT_ALGORITHM) -> str:
+    """Hex digest of a file: mmap for large files, 1 MB reads otherwise"""
+    digest = _new_digest(algorithm)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        else:
+            for chunk in iter(lambda: f.read(BUFFER_SIZE), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _hash_job(job: tuple) -> tuple:
+    # Runs in a worker process; errors come back as values so one bad file doesn't sink the batch
+    path, algorithm = job
+    try:
+        return hash_file(path, algorithm), None
+    except OSError as e:
+        return None, str(e)
+
+
+class HashIndex:
+    """Persistent digests keyed by (device, inode, size, mtime, algorithm).
+
+    A file whose inode, size and mtime are unchanged is never read again;
+    renames keep their entry since the inode stays the same. Inode numbers
+    are only unique per filesystem, hence the device.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._pool = get_pool(path)
+        conn = self._pool.connection()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(file_hashes)")}
+        if columns and "device" not in columns:
+            # Index from before the device column; it is only a cache, so start over
+            conn.execute("DROP TABLE file_hashes")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_hashes ("
+            "device INTEGER NOT NULL, inode INTEGER NOT NULL, size INTEGER NOT NULL, mtime REAL NOT NULL, "
+            "algorithm TEXT NOT NULL, digest TEXT NOT NULL, path TEXT, hashed_at REAL, "
+            "PRIMARY KEY (device, inode, size, mtime, algorithm))"
+        )
+        conn.commit()
+
+    def lookup(self, device: int, inode: int, size: int, mtime: float, algorithm: str):
+        row = self._pool.connection().execute(
+            "SELECT digest FROM file_hashes "
+            "WHERE device = ? AND inode = ? AND size = ? AND mtime = ? AND algorithm = ?",
+            (device, inode, size, mtime, algorithm)
+        ).fetchone()
+        return row[0] if row else None
+
+    def store(self, rows) -> None:
+        """rows of (device, inode, size, mtime, algorithm, digest, path)"""
+        conn = self._pool.connection()
+        now = time.time()
+        conn.executemany(
+            "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(*row, now) for row in rows]
+        )
+        conn.commit()
+
+    def digest(self, path: str, algorithm=DEFAULT_ALGORITHM) -> str:
+        """Digest of one file, from the index when its stat key is unchanged"""
+        st = os.stat(path)
+        cached = self.lookup(st.st_dev, st.st_ino, st.st_size, st.st_mtime, algorithm)
+        if cached is not None:
+            return cached
+        digest = hash_file(path, algorithm)
+        self.store([(st.st_dev, st.st_ino, st.st_size, st.st_mtime, algorithm, digest, os.path.abspath(path))])
+        return digest
+
+
+def hash_tree(root: str, patterns=None, algorithm=DEFAULT_ALGORITHM, index=None, workers=None, entries=None,
+              stats=None):
+    """Yield (WalkEntry, digest, error) for the files under `root`.
+
+    Index hits are answered without reading the file; misses are hashed on a
+    process pool in batches and written back to the index. `entries` lets a
+    caller pass a pre-filtered walk instead of scanning `root`; `stats`, if
+    given, counts "cached" and "hashed" files.
+    """
+    _new_digest(algorithm)
+    if entries is None:
+        entries = (e for e in scan(root, patterns=patterns, with_stat=True) if e.type == "file")
+    entries = iter(entries)
+    stats = stats if stats is not None else {}
+    stats.setdefault("cached", 0)
+    stats.setdefault("hashed", 0)
+
+    # Started on the first miss, so fully indexed trees never spawn processes
+    pool = None
+    try:
+        while True:
+            batch = list(islice(entries, HASH_BATCH))
+            if not batch:
+                return
+            misses = []
+            for entry in batch:
+                cached = (index.lookup(entry.device, entry.inode, entry.size, entry.mtime, algorithm)
+                          if index and entry.device is not None else None)
+                if cached is not None:
+                    stats["cached"] += 1
+                    yield entry, cached, None
+                else:
+                    misses.append(entry)
+            if not misses:
+                continue
+
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            jobs = [(os.path.join(root, entry.path), algorithm) for entry in misses]
+            hashed = []
+            for entry, (digest, error) in zip(misses, pool.map(_hash_job, jobs, chunksize=HASH_CHUNKSIZE)):
+                if digest is not None:
+                    stats["hashed"] += 1
+                    # Entries whose stat failed have no key to index under
+                    if entry.device is not None:
+                        hashed.append((entry.device, entry.inode, entry.size, entry.mtime, algorithm, digest,
+                                       os.path.abspath(os.path.join(root, entry.path))))
+                yield entry, digest, error
+            if index and hashed:
+                index.store(hashed)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def find_duplicates(root: str, patterns=None, algorithm=DEFAULT_ALGORITHM, index=None, workers=None,
+                    stats=None) -> list:
+    """Groups of identical files, largest waste first.
+
+    Only files that share a size with another file are hashed at all.
+    """
+    by_size = defaultdict(list)
+    for entry in scan(root, patterns=patterns, with_stat=True):
+        if entry.type == "file" and entry.size:
+            by_size[entry.size].append(entry)
+    candidates = (entry for group in by_size.values() if len(group) > 1 for entry in group)
+
+    by_digest = defaultdict(list)
+    for entry, digest, _ in hash_tree(root, algorithm=algorithm, index=index, workers=workers,
+                                      entries=candidates, stats=stats):
+        if digest is not None:
+            by_digest[(entry.size, digest)].append(entry.path)
+
+    groups = [
+        {"digest": digest, "size": size, "paths": sorted(paths), "wasted_bytes": size * (len(paths) - 1)}
+        for (size, digest), paths in by_digest.items() if len(paths) > 1
+    ]
+    groups.sort(key=lambda group: group["wasted_bytes"], reverse=True)
+    return groups
@@ -0,0 +1,132 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from fnmatch import fnmatch
+
+
+class WalkEntry:
+    """One file or directory found by scan(); stat fields are filled on demand"""
+
+    __slots__ = ("path", "name", "type", "size", "mtime", "inode", "device")
+
+    def __init__(self, path: str, name: str, kind: str, size=None, mtime=None, inode=None, device=None):
+        self.path = path
+        self.name = name
+        self.type = kind
+        self.size = size
+        self.mtime = mtime
+        self.inode = inode
+        self.device = device
+
+    def to_dict(self) -> dict:
+        return {"path": self.path, "name": self.name, "type": self.type, "size": self.size, "mtime": self.mtime}
+
+
+def match_patterns(patterns, relpath: str, name: str) -> bool:
+    # Patterns with a '/' match the path relative to the root, others just the name
+    return any(fnmatch(relpath if "/" in pattern else name, pattern) for pattern in patterns)
+
+
+def walk_key(relpath: str) -> tuple:
+    """Sort key of a relative path in single-worker scan() order.
+
+    A directory's own entries come before its subtrees, so the order is by
+    parent directory components first, then by name.
+    """
+    parts = relpath.split("/")
+    return tuple(parts[:-1]), parts[-1]
+
+
+def _scan_dir(directory: str, prefix: str, depth: int, patterns, max_depth, include_dirs: bool,
+              with_stat: bool, after, sort: bool) -> tuple:
+    """Entries of one directory plus (path, prefix, depth) of the subdirectories to descend into
+
+    `prefix` is the directory's path relative to the scan root ('' or ending in '/').
+    `after` is a walk_key(): entries at or before it are dropped and subtrees
+    that lie wholly before it are not descended into.
+    """
+    entries, subdirs = [], []
+    parents = tuple(prefix[:-1].split("/")) if prefix else ()
+    if after is not None:
+        after_parents, after_name = after
+        if parents < after_parents and parents != after_parents[:len(parents)]:
+            return entries, subdirs
+        # Entries of a directory that sorts before the cursor's are all behind it
+        skip_before = after_name if parents == after_parents else None
+        skip_all = parents < after_parents
+    try:
+        with os.scandir(directory) as it:
+            dir_entries = sorted(it, key=lambda e: e.name) if sort else list(it)
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        return entries, subdirs
+
+    for entry in dir_entries:
+        # d_type from readdir answers these without a stat call
+        name = entry.name
+        relpath = prefix + name
+        is_dir = entry.is_dir(follow_symlinks=False)
+        if is_dir:
+            subtree = parents + (name,)
+            if (max_depth is None or depth < max_depth) and (
+                    after is None or not subtree < after_parents[:len(subtree)]):
+                subdirs.append((entry.path, relpath + "/", depth + 1))
+            if not include_dirs:
+                continue
+            kind = "dir"
+        else:
+            kind = "symlink" if entry.is_symlink() else "file"
+        if after is not None and (skip_all or (skip_before is not None and name <= skip_before)):
+            continue
+        if patterns and not match_patterns(patterns, relpath, name):
+            continue
+        # inode() comes from readdir on POSIX, so it costs nothing extra
+        item = WalkEntry(relpath, name, kind, inode=entry.inode())
+        if with_stat:
+            try:
+                st = entry.stat(follow_symlinks=False)
+                item.size, item.mtime, item.device = st.st_size, st.st_mtime, st.st_dev
+            except OSError:
+                pass
+        entries.append(item)
+    return entries, subdirs
+
+
+def scan(root: str, patterns=None, max_depth=None, include_dirs=False, with_stat=True, workers=1, after=None):
+    """Yield WalkEntry objects under `root`, streaming, via os.scandir.
+
+    `max_depth` 0 lists only `root` itself; None recurses fully. With
+    `workers` > 1 subtrees are scanned on a thread pool and entries arrive in
+    completion order; with one worker the order is walk_key() order
+    (depth-first, names ascending). `after` (a relative path) resumes past
+    that entry in walk_key() order, without reading the subtrees before it.
+    """
+    if isinstance(patterns, str):
+        patterns = [p for p in patterns.split(",") if p]
+    options = (patterns, max_depth, include_dirs, with_stat, walk_key(after) if after else None)
+
+    if workers <= 1:
+        stack = [(root, "", 0)]
+        while stack:
+            directory, prefix, depth = stack.pop()
+            entries, subdirs = _scan_dir(directory, prefix, depth, *options, sort=True)
+            yield from entries
+            stack.extend(reversed(subdirs))
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as pool:
+        pending = {pool.submit(_scan_dir, root, "", 0, *options, False)}
+        backlog = deque()
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entries, subdirs = future.result()
+                    backlog.extend(subdirs)
+                    yield from entries
+                # Keep a bounded number of directories in flight
+                while backlog and len(pending) < workers * 4:
+                    directory, prefix, depth = backlog.popleft()
+                    pending.add(pool.submit(_scan_dir, directory, prefix, depth, *options, False))
+        finally:
+            for future in pending:
+                future.cancel()
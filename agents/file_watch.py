@@ -0,0 +1,278 @@
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from agents.file_walk import match_patterns, scan
+
+# inotify(7) flags
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+
+DEBOUNCE = 0.2
+# Longest a pending event waits under continuous activity
+MAX_LATENCY = 2.0
+POLL_INTERVAL = 1.0
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, "inotify_init1") and hasattr(libc, "inotify_add_watch") else None
+
+
+_libc = _load_libc()
+
+
+def inotify_available() -> bool:
+    return _libc is not None
+
+
+def _coalesce(pending: dict, path: str, kind: str, event: str) -> None:
+    """Fold a new event into the pending net change for `path`"""
+    previous = pending.get(path)
+    if previous is None:
+        pending[path] = (event, kind)
+        return
+    before = previous[0]
+    if before == "created" and event == "deleted":
+        del pending[path]            # came and went within the window
+    elif before == "created":
+        pass                         # created + modified is still a create
+    elif before == "deleted" and event == "created":
+        pending[path] = ("modified", kind)
+    else:
+        pending[path] = (event, kind)
+
+
+class _Inotify:
+    """Recursive inotify watch of a tree; read() returns raw (relpath, kind, event) tuples"""
+
+    def __init__(self, root: str, recursive: bool):
+        self.root = root
+        self.recursive = recursive
+        self.fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {}
+        self._add(root)
+        if recursive:
+            for entry in scan(root, include_dirs=True, with_stat=False):
+                if entry.type == "dir":
+                    self._add(os.path.join(root, entry.path))
+
+    def _add(self, directory: str) -> None:
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self.paths[wd] = directory
+
+    def _forget(self, directory: str) -> None:
+        """Drop the path mappings of a directory that moved or vanished, and of its subtree"""
+        prefix = directory + os.sep
+        for wd, path in list(self.paths.items()):
+            if path == directory or path.startswith(prefix):
+                del self.paths[wd]
+
+    def _add_tree(self, directory: str) -> list:
+        """Watch a new subtree; anything created in it before the watch landed is reported"""
+        self._add(directory)
+        events = []
+        for entry in scan(directory, include_dirs=True, with_stat=False):
+            path = os.path.join(directory, entry.path)
+            if entry.type == "dir":
+                self._add(path)
+            events.append((os.path.relpath(path, self.root), entry.type, "created"))
+        return events
+
+    def read(self, timeout: float) -> list:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += _EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                events.append(("", "dir", "overflow"))
+                continue
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            directory = self.paths.get(wd)
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                # A dir moved within the tree was already re-mapped by its IN_MOVED_TO
+                # (add_watch returns the same wd), so only forget paths that are gone
+                if directory is not None and not os.path.isdir(directory):
+                    self._forget(directory)
+                continue
+            if directory is None or not name:
+                continue
+
+            path = os.path.join(directory, os.fsdecode(name))
+            kind = "dir" if mask & IN_ISDIR else "file"
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                events.append((os.path.relpath(path, self.root), kind, "created"))
+                if kind == "dir" and self.recursive:
+                    events.extend(self._add_tree(path))
+                continue
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                if kind == "dir" and mask & IN_MOVED_FROM:
+                    # Re-added under the new name if it reappears inside the tree
+                    self._forget(path)
+                event = "deleted"
+            else:
+                event = "modified"
+            events.append((os.path.relpath(path, self.root), kind, event))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _Poller:
+    """Snapshot-diff fallback: rescans the tree every `interval` seconds"""
+
+    def __init__(self, root: str, recursive: bool, interval: float):
+        self.root = root
+        self.max_depth = None if recursive else 0
+        self.interval = interval
+        self.snapshot = self._scan()
+        self._scanned_at = time.monotonic()
+
+    def _scan(self) -> dict:
+        return {entry.path: (entry.type, entry.size, entry.mtime)
+                for entry in scan(self.root, max_depth=self.max_depth, include_dirs=True)}
+
+    def read(self, timeout: float) -> list:
+        wait = self._scanned_at + self.interval - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(wait, 0.0))
+        current = self._scan()
+        self._scanned_at = time.monotonic()
+        events = []
+        for path, state in current.items():
+            previous = self.snapshot.get(path)
+            if previous is None:
+                events.append((path, state[0], "created"))
+            elif previous != state and state[0] != "dir":
+                events.append((path, state[0], "modified"))
+        events.extend((path, state[0], "deleted") for path, state in self.snapshot.items() if path not in current)
+        self.snapshot = current
+        return events
+
+    def close(self) -> None:
+        pass
+
+
+def watch(path: str, recursive=True, patterns=None, debounce=DEBOUNCE, poll_interval=POLL_INTERVAL,
+          backend=None, stop=None, max_latency=MAX_LATENCY):
+    """Yield {"event", "path", "type"} dicts for changes under `path`.
+
+    Uses inotify on Linux (backend="inotify") and falls back to polling
+    (backend="poll") elsewhere. Events are held until `debounce` seconds pass
+    without activity, but never longer than `max_latency`, and coalesced per
+    path: a burst of writes arrives as one event per path, and a temp file
+    that came and went not at all. A lost-events queue overflow is reported
+    as an "overflow" event. Runs until closed or `stop` (a threading.Event)
+    is set; events still pending at that point are delivered first.
+    """
+    if isinstance(patterns, str):
+        patterns = [p for p in patterns.split(",") if p]
+    if backend is None:
+        backend = "inotify" if inotify_available() else "poll"
+    source = _Inotify(path, recursive) if backend == "inotify" else _Poller(path, recursive, poll_interval)
+    # Polling needs at least one interval of quiet to see that activity stopped
+    quiet = debounce if backend == "inotify" else max(debounce, poll_interval)
+
+    pending = {}
+    first_event = last_event = None
+    try:
+        while stop is None or not stop.is_set():
+            now = time.monotonic()
+            if last_event is None:
+                timeout = quiet
+            else:
+                timeout = max(0.0, min(last_event + quiet, first_event + max_latency) - now)
+            # Wake at least twice a second to notice `stop`
+            for relpath, kind, event in source.read(min(timeout, 0.5)):
+                if patterns and relpath and not match_patterns(patterns, relpath, os.path.basename(relpath)):
+                    continue
+                _coalesce(pending, relpath, kind, event)
+                last_event = time.monotonic()
+                first_event = first_event or last_event
+            now = time.monotonic()
+            if pending and (now - last_event >= quiet or now - first_event >= max_latency):
+                yield from _flush(pending)
+                pending = {}
+                first_event = last_event = None
+        yield from _flush(pending)
+    finally:
+        source.close()
+
+
+def _flush(pending: dict):
+    for relpath, (event, kind) in pending.items():
+        yield {"event": event, "path": relpath, "type": kind}
+
+
+async def awatch(path: str, **options):
+    """Async iterator over watch() events; the blocking watch runs in a thread"""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def run():
+        try:
+            for event in watch(path, stop=stop, **options):
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    thread = threading.Thread(target=run, name="file-watch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
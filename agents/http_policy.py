@@ -0,0 +1,190 @@
+import asyncio
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Per-host breaker: opens after `failure_threshold` consecutive failures.
+
+    An open circuit rejects requests for `reset_timeout` seconds, then lets a
+    single trial request through (half-open); its outcome closes or reopens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = {}
+        self._opened_at = {}
+        self._trial_running = set()
+        self._lock = threading.Lock()
+
+    def allow(self, host: str):
+        """False to reject; otherwise truthy, and "trial" for the half-open trial.
+
+        Whoever is granted the trial must hand it back with end_trial() once
+        the request is over, however it ended.
+        """
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at < self.reset_timeout or host in self._trial_running:
+                return False
+            self._trial_running.add(host)
+            return "trial"
+
+    def end_trial(self, host: str) -> None:
+        # No-op when record_success/record_failure already settled it
+        with self._lock:
+            self._trial_running.discard(host)
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._trial_running.discard(host)
+
+    def record_failure(self, host: str) -> None:
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.failure_threshold or host in self._trial_running:
+                self._opened_at[host] = time.monotonic()
+            self._trial_running.discard(host)
+
+    def state(self, host: str) -> str:
+        with self._lock:
+            if host not in self._opened_at:
+                return "closed"
+            if time.monotonic() - self._opened_at[host] < self.reset_timeout:
+                return "open"
+            return "half-open"
+
+
+class RequestPolicy:
+    """Timeouts, retries and circuit breaking around a single HTTP call.
+
+    Only idempotent methods are retried, on connection errors, timeouts and
+    `retry_statuses`, with full-jitter exponential backoff. Only transport
+    errors (`retry_on`) and 5xx responses count against the host's circuit;
+    other errors (a bad URL, a cassette miss) say nothing about the host.
+    Every attempt is recorded with its timing so results show where the time
+    went.
+    """
+
+    def __init__(self, connect_timeout=5.0, read_timeout=30.0, max_retries=2, backoff_base=0.25,
+                 backoff_max=5.0, retry_statuses=(502, 503, 504), failure_threshold=5, reset_timeout=30.0):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = set(retry_statuses)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout) if failure_threshold else None
+
+    @property
+    def timeout(self) -> tuple:
+        return self.connect_timeout, self.read_timeout
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def send(self, method: str, url: str, send, attempts: list, retry_on=(), expected_status=None):
+        """Call `send(timeout)` under the policy and return the final response.
+
+        Per-attempt timings are appended to `attempts`, also when it raises.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            host, trial = self._admit(url)
+            started = time.perf_counter()
+            try:
+                response = send(self.timeout)
+            except retry_on as e:
+                self._failed(host, attempts, started, error=e)
+                if not self._should_retry(method, attempt):
+                    raise
+            except Exception as e:
+                self._failed(host, attempts, started, error=e, count=False)
+                raise
+            else:
+                retry = self._finished(host, attempts, started, response, expected_status)
+                if not (retry and self._should_retry(method, attempt)):
+                    return response
+                response.close()
+            finally:
+                if trial:
+                    self.breaker.end_trial(host)
+            time.sleep(self.backoff(attempt))
+
+    async def asend(self, method: str, url: str, send, attempts: list, retry_on=(), expected_status=None):
+        """Async counterpart of send(); `send(timeout)` returns an awaitable"""
+        attempt = 0
+        while True:
+            attempt += 1
+            host, trial = self._admit(url)
+            started = time.perf_counter()
+            try:
+                response = await send(self.timeout)
+            except retry_on as e:
+                self._failed(host, attempts, started, error=e)
+                if not self._should_retry(method, attempt):
+                    raise
+            except Exception as e:
+                self._failed(host, attempts, started, error=e, count=False)
+                raise
+            else:
+                retry = self._finished(host, attempts, started, response, expected_status)
+                if not (retry and self._should_retry(method, attempt)):
+                    return response
+            finally:
+                # Cancellation ends the trial too, without counting as a failure
+                if trial:
+                    self.breaker.end_trial(host)
+            await asyncio.sleep(self.backoff(attempt))
+
+    def _admit(self, url: str) -> tuple:
+        """(host, whether this attempt is the half-open trial)"""
+        host = urlsplit(url).netloc
+        if self.breaker is None:
+            return host, False
+        allowed = self.breaker.allow(host)
+        if not allowed:
+            raise CircuitOpenError(f"Circuit open for {host}: too many recent failures")
+        return host, allowed == "trial"
+
+    def _should_retry(self, method: str, attempt: int) -> bool:
+        return method.upper() in IDEMPOTENT_METHODS and attempt <= self.max_retries
+
+    def _failed(self, host, attempts, started, error, count=True):
+        attempts.append({
+            "attempt": len(attempts) + 1,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "error": str(error) or type(error).__name__,
+        })
+        if count and self.breaker is not None:
+            self.breaker.record_failure(host)
+
+    def _finished(self, host, attempts, started, response, expected_status) -> bool:
+        """Record a completed attempt; True if its status warrants a retry"""
+        status = response.status_code
+        attempts.append({
+            "attempt": len(attempts) + 1,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "status_code": status,
+        })
+        if self.breaker is not None:
+            if status >= 500 and status != expected_status:
+                self.breaker.record_failure(host)
+            else:
+                self.breaker.record_success(host)
+        return status in self.retry_statuses and status != expected_status
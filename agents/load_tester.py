@@ -0,0 +1,181 @@
+import math
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class LatencyHistogram:
+    """Streaming log-linear (HDR-style) latency histogram.
+
+    Values are recorded in nanoseconds into buckets whose width grows with
+    magnitude, so memory stays constant no matter how many samples are taken
+    and percentiles are accurate to roughly 1 / 2**sub_bucket_bits.
+    """
+
+    def __init__(self, sub_bucket_bits=6):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts = {}
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+    def _bucket(self, value: int) -> tuple:
+        shift = max(0, value.bit_length() - self.sub_bucket_bits - 1)
+        return shift, value >> shift
+
+    def record(self, value: int) -> None:
+        key = self._bucket(value)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.total += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, pct: float) -> int:
+        """Return the upper bound of the bucket holding the pct-th percentile"""
+        if not self.total:
+            return 0
+        rank = max(1, math.ceil(pct / 100 * self.total))
+        seen = 0
+        for shift, top in sorted(self.counts):
+            seen += self.counts[(shift, top)]
+            if seen >= rank:
+                return min(((top + 1) << shift) - 1, self.max)
+        return self.max
+
+    def buckets(self) -> list:
+        """Coarse power-of-two view for reports: [(upper_bound_ns, count), ...]"""
+        coarse = {}
+        for (shift, top), count in self.counts.items():
+            upper = 1 << (((top + 1) << shift) - 1).bit_length()
+            coarse[upper] = coarse.get(upper, 0) + count
+        return sorted(coarse.items())
+
+
+def _load_session(session: requests.Session, concurrency: int) -> requests.Session:
+    """A session like `session` whose connection pool has a slot per worker.
+
+    The default pool keeps 10 connections per host, so more workers than
+    that would open and drop connections on every request.
+    """
+    load_session = requests.Session()
+    load_session.headers.update(session.headers)
+    load_session.cookies.update(session.cookies)
+    load_session.auth = session.auth
+    load_session.proxies.update(session.proxies)
+    load_session.verify = session.verify
+    load_session.cert = session.cert
+    adapter = HTTPAdapter(pool_maxsize=concurrency)
+    load_session.mount("http://", adapter)
+    load_session.mount("https://", adapter)
+    return load_session
+
+
+def run_load(session, method: str, url: str, load: dict, expected_status=200, **request_kwargs) -> dict:
+    """Fire one endpoint repeatedly and summarise latency and errors.
+
+    `load` accepts 'requests' (total count), 'duration' (seconds),
+    'rps' (target request rate) and 'concurrency' (worker threads).
+    At least one of 'requests' or 'duration' bounds the run. With 'rps',
+    latency is measured from each request's scheduled start, so time spent
+    waiting behind a slow server counts (no coordinated omission); the
+    send-to-response time alone is reported as 'service_time_ms'.
+    """
+    total = load.get("requests")
+    duration = load.get("duration")
+    if not total and not duration:
+        raise ValueError("Load test needs 'requests' or 'duration'")
+    rps = load.get("rps")
+    concurrency = max(1, int(load.get("concurrency", 1)))
+    timeout = load.get("timeout", 30)
+    session = _load_session(session, concurrency)
+
+    histogram = LatencyHistogram()
+    service = LatencyHistogram() if rps else None
+    lock = threading.Lock()
+    state = {"issued": 0, "completed": 0, "errors": 0, "status_codes": {}}
+    start = time.perf_counter_ns()
+    deadline = start + int(duration * 1e9) if duration else None
+
+    def next_slot():
+        # Hand out request numbers and their scheduled start times
+        with lock:
+            now = time.perf_counter_ns()
+            i = state["issued"]
+            scheduled = start + int(i * 1e9 / rps) if rps else now
+            if (total and i >= total) or (deadline and max(now, scheduled) >= deadline):
+                return None
+            state["issued"] += 1
+        return scheduled
+
+    def worker():
+        while True:
+            scheduled = next_slot()
+            if scheduled is None:
+                return
+            delay = (scheduled - time.perf_counter_ns()) / 1e9
+            if delay > 0:
+                time.sleep(delay)
+            began = time.perf_counter_ns()
+            try:
+                response = session.request(method=method, url=url, timeout=timeout, **request_kwargs)
+                response.content  # include body transfer in the latency
+                finished = time.perf_counter_ns()
+                with lock:
+                    # At a fixed rate the request was due at `scheduled`, however late it went out
+                    histogram.record(finished - (scheduled if rps else began))
+                    if service is not None:
+                        service.record(finished - began)
+                    codes = state["status_codes"]
+                    codes[response.status_code] = codes.get(response.status_code, 0) + 1
+                    if response.status_code != expected_status:
+                        state["errors"] += 1
+                    state["completed"] += 1
+            except Exception:
+                with lock:
+                    state["errors"] += 1
+                    state["completed"] += 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    session.close()
+
+    elapsed_s = (time.perf_counter_ns() - start) / 1e9
+    attempted = state["completed"]
+
+    stats = {
+        "requests": attempted,
+        "duration_s": round(elapsed_s, 3),
+        "throughput_rps": round(attempted / elapsed_s, 2) if elapsed_s else 0,
+        "error_rate": round(state["errors"] / attempted, 4) if attempted else 0,
+        "errors": state["errors"],
+        "status_codes": state["status_codes"],
+        "latency_ms": _latency_summary(histogram),
+        "histogram_ms": [(_to_ms(upper), count) for upper, count in histogram.buckets()],
+    }
+    if service is not None:
+        stats["service_time_ms"] = _latency_summary(service)
+    return stats
+
+
+def _to_ms(ns) -> float:
+    return round(ns / 1e6, 3)
+
+
+def _latency_summary(histogram: LatencyHistogram) -> dict:
+    return {
+        "min": _to_ms(histogram.min or 0),
+        "mean": _to_ms(histogram.sum / histogram.total) if histogram.total else 0,
+        "p50": _to_ms(histogram.percentile(50)),
+        "p90": _to_ms(histogram.percentile(90)),
+        "p99": _to_ms(histogram.percentile(99)),
+        "max": _to_ms(histogram.max),
+    }
@@ -0,0 +1,109 @@
+import json
+import re
+
+QUOTES = "\"'"
+
+
+def _next_key(prompt: str, key_re, start: int):
+    """First `key=` at or after `start` that is not inside quoted text.
+
+    An unbalanced quote (an apostrophe in a path, say) is not treated as
+    quoting: the first `key=` after it is used instead.
+    """
+    quote = None
+    scanned = start
+    first = None
+    for match in key_re.finditer(prompt, start):
+        for char in prompt[scanned:match.start()]:
+            if quote:
+                quote = None if char == quote else quote
+            elif char in QUOTES:
+                quote = char
+        scanned = match.start()
+        if quote is None:
+            return match
+        first = first or match
+    return first
+
+
+def _key_pattern(keys) -> str:
+    return r'(?<!\S)(' + "|".join(map(re.escape, keys)) + r')='
+
+
+def parse_key_values(prompt: str, keys, json_keys=(), text_keys=(), text_end_keys=()) -> dict:
+    """Parse 'key=value key=value' where each value runs until the next known key.
+
+    Values may therefore contain spaces (SQL, paths), and a `key=` inside
+    quoted text is not a boundary. A value wrapped in quotes (key="...") is
+    taken verbatim up to the quote that is followed by the next key or the
+    end of the prompt, so it may contain quotes of its own. `text_keys` hold
+    free text such as SQL, which may itself contain 'name=': unless quoted,
+    their value ends only at one of `text_end_keys` (or the end of the
+    prompt). Values of `json_keys` are decoded as JSON. Raises ValueError
+    for malformed values.
+    """
+    key_re = re.compile(_key_pattern(keys))
+    end_re = re.compile(_key_pattern(text_end_keys)) if text_end_keys else None
+    quoted_re = re.compile(r'(["\'])(.*?)\1(?=\s*$|\s+' + _key_pattern(keys) + ')', re.S)
+    task = {}
+    match = _next_key(prompt, key_re, 0)
+    while match:
+        key = match.group(1)
+        start = match.end()
+        quoted = quoted_re.match(prompt, start)
+        if quoted:
+            value, end = quoted.group(2), quoted.end()
+        else:
+            boundary = key_re if key not in text_keys else end_re
+            following = _next_key(prompt, boundary, start) if boundary else None
+            end = following.start() if following else len(prompt)
+            value = prompt[start:end].strip()
+        if key in json_keys:
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON for '{key}': {e}") from e
+        task[key] = value
+        match = _next_key(prompt, key_re, end)
+    return task
+
+
+def parse_batch(prompt: str):
+    """Task dicts from a JSON list or NDJSON prompt; None if it is neither.
+
+    A single JSON object is not a batch. Raises ValueError for malformed
+    JSON or items that are not objects.
+    """
+    prompt = prompt.strip()
+    if prompt.startswith("["):
+        try:
+            tasks = json.loads(prompt)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON batch: {e}") from e
+    else:
+        lines = [line for line in prompt.splitlines() if line.strip()]
+        if not (len(lines) > 1 and all(line.lstrip().startswith("{") for line in lines)):
+            return None
+        tasks = []
+        for number, line in enumerate(lines, 1):
+            try:
+                tasks.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on batch line {number}: {e}") from e
+    if not isinstance(tasks, list) or not all(isinstance(task, dict) for task in tasks):
+        raise ValueError("Batch items must be JSON objects")
+    return tasks
+
+
+def parse_prompt(prompt: str, keys, json_keys=(), text_keys=(), text_end_keys=()) -> dict:
+    """A single task: a JSON object or key=value text; ValueError if malformed"""
+    prompt = prompt.strip()
+    if prompt.startswith("{"):
+        try:
+            task = json.loads(prompt)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON prompt: {e}") from e
+        if not isinstance(task, dict):
+            raise ValueError("A JSON prompt must be an object")
+        return task
+    return parse_key_values(prompt, keys, json_keys, text_keys, text_end_keys)
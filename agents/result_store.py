@@ -0,0 +1,131 @@
+import json
+import sqlite3
+import threading
+import uuid
+from dataclasses import dataclass
+from xml.sax.saxutils import escape, quoteattr
+
+CORE_FIELDS = ("name", "method", "url", "timestamp", "status", "response_time", "status_code", "validations", "errors")
+
+
+@dataclass(slots=True)
+class TestRecord:
+    """Compact in-memory summary of one finished endpoint test"""
+    run_id: str
+    seq: int
+    name: str
+    method: str
+    url: str
+    status: str
+    status_code: int
+    response_time: float
+
+    @classmethod
+    def from_result(cls, run_id, seq: int, result: dict) -> "TestRecord":
+        return cls(run_id, seq, result["name"], result["method"], result["url"],
+                   result["status"], result["status_code"], result["response_time"])
+
+
+class ResultStore:
+    """Append-only SQLite store of endpoint results, one row per test.
+
+    Results are written as soon as each test finishes and read back in plan
+    order with fetchmany, so reports never need the whole run in memory.
+    """
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "run_id TEXT NOT NULL, seq INTEGER NOT NULL, name TEXT, method TEXT, url TEXT, "
+            "timestamp TEXT, status TEXT, response_time REAL, status_code INTEGER, "
+            "validations TEXT, errors TEXT, details TEXT, PRIMARY KEY (run_id, seq))"
+        )
+        self._conn.commit()
+
+    def new_run(self) -> str:
+        return uuid.uuid4().hex
+
+    def append(self, run_id: str, seq: int, result: dict) -> TestRecord:
+        details = {k: v for k, v in result.items() if k not in CORE_FIELDS}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id, seq, result["name"], result["method"], result["url"],
+                    result["timestamp"], result["status"], result["response_time"],
+                    result["status_code"], json.dumps(result["validations"], ensure_ascii=False),
+                    json.dumps(result["errors"], ensure_ascii=False),
+                    json.dumps(details, ensure_ascii=False, default=str),
+                )
+            )
+            self._conn.commit()
+        return TestRecord.from_result(run_id, seq, result)
+
+    def counts(self, run_id: str) -> tuple:
+        """(total, passed) for a run"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(status = 'PASSED'), 0) FROM results WHERE run_id = ?",
+                (run_id,)
+            ).fetchone()
+        return row[0], row[1]
+
+    def iter_results(self, run_id: str, batch_size=200):
+        """Yield full result dicts of a run in plan order"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT name, method, url, timestamp, status, response_time, status_code, "
+                "validations, errors, details FROM results WHERE run_id = ? ORDER BY seq",
+                (run_id,)
+            )
+        while True:
+            with self._lock:
+                batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            for row in batch:
+                yield self._to_dict(row)
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        result = dict(zip(CORE_FIELDS, row[:7]))
+        result["validations"] = json.loads(row[7])
+        result["errors"] = json.loads(row[8])
+        result.update(json.loads(row[9]))
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def render_json(store: ResultStore, run_id: str):
+    """Stream a run as a JSON document, one result at a time"""
+    total, passed = store.counts(run_id)
+    yield f'{{"run_id": "{run_id}", "total": {total}, "passed": {passed}, "failed": {total - passed}, "results": ['
+    for i, result in enumerate(store.iter_results(run_id)):
+        yield ("," if i else "") + json.dumps(result, ensure_ascii=False, default=str)
+    yield "]}"
+
+
+def render_junit(store: ResultStore, run_id: str):
+    """Stream a run as JUnit XML"""
+    total, passed = store.counts(run_id)
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<testsuite name="api-tests" tests="{total}" failures="{total - passed}">\n'
+    for result in store.iter_results(run_id):
+        seconds = (result["response_time"] or 0) / 1000
+        yield (f'  <testcase classname={quoteattr(result["method"] + " " + result["url"])} '
+               f'name={quoteattr(result["name"])} time="{seconds:.3f}"')
+        if result["status"] == "PASSED":
+            yield "/>\n"
+            continue
+        failures = result["errors"] or [v for v in result["validations"] if "✅" not in v]
+        yield ">\n"
+        yield (f'    <failure message={quoteattr(failures[0] if failures else "failed")}>'
+               f'{escape(chr(10).join(failures))}</failure>\n')
+        yield "  </testcase>\n"
+    yield "</testsuite>\n"
@@ -1,46 +1,360 @@
-import sqlite3
+import base64
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import ExitStack, nullcontext
+from agents.prompt_parser import parse_batch, parse_prompt
+from agents.sql_bulk import BATCH_SIZE, export_query, load_file
+from agents.sql_executor import QueryExecutor
+from agents.sql_profile import SessionProfile
+from agents.sqlite_pool import get_pool
+
+FETCH_BATCH_SIZE = 500
+# Databases with a live QueryExecutor (and its worker threads) per agent
+MAX_EXECUTORS = 4
+
+# Prompt keys; a value runs until the next known key, so paths may contain spaces
+PROMPT_KEYS = ("query", "db_path", "params", "many", "max_rows", "max_bytes", "batch_size",
+               "page_size", "cursor", "order_by", "load", "export", "table", "format", "indexes",
+               "defer_indexes", "instrument", "queries")
+JSON_KEYS = ("params", "many", "indexes", "defer_indexes", "instrument", "queries")
+# SQL may itself contain 'name=' text (WHERE cursor=1), so an unquoted query
+# ends only at a key that is unlikely to be a column name, or at the end
+TEXT_KEYS = ("query",)
+QUERY_END_KEYS = ("db_path", "params", "many", "max_rows", "max_bytes", "batch_size", "page_size",
+                  "order_by", "export", "indexes", "defer_indexes", "instrument")
+# Task kinds that need their own connection or transaction, so run_batch can't host them
+NON_BATCH_KEYS = ("load", "export", "page_size", "queries")
 
 class SQLAgent:
-    def __init__(self, temperature=0.7):
+    def __init__(self, temperature=0.7, pragmas=None, statement_cache_size=128, instrument=False,
+                 max_workers=8):
         self.temperature = temperature
+        # PRAGMAs applied to pooled connections; None uses the pool defaults (WAL for new files)
+        self.pragmas = pragmas
+        # Prepared statements kept per connection, so re-running a parameterised query skips planning
+        self.statement_cache_size = statement_cache_size
+        # Timing, VM steps and query plans per query; a task's `instrument` key overrides it
+        self.instrument = instrument
+        self.profile = SessionProfile()
+        # Read workers per database for `queries` batches
+        self.max_workers = max_workers
+        # Least recently used first; the oldest is closed once MAX_EXECUTORS is exceeded
+        self._executors = OrderedDict()
+        self._executors_lock = threading.Lock()
+        # Stop worker threads even if the agent is dropped without close()
+        self._finalizer = weakref.finalize(self, _close_executors, self._executors, self._executors_lock)
 
     def run(self, prompt: str) -> dict:
-        task = self._parse_prompt(prompt)
+        try:
+            tasks = parse_batch(prompt)
+            if tasks is not None:
+                return {"results": list(self.run_batch(tasks))}
+            task = self._parse_prompt(prompt)
+        except ValueError as e:
+            return {"error": str(e)}
         return self._handle(task)
 
+    def run_batch(self, tasks, atomic=True):
+        """Run query tasks as one unit, yielding a result per task as it finishes.
+
+        Each database gets one connection and one transaction for the whole
+        batch, and every item runs under a savepoint. With `atomic` the first
+        failure rolls the batch back and later items are skipped; otherwise
+        only the failing item is undone. Items are single queries (with
+        `params` or `many`); load/export/page_size/queries items are rejected
+        as errors. The last item yielded is a summary:
+        {"batch": "committed" | "rolled back", "items": n}.
+        """
+        connections = {}
+        failed = False
+        finished = False
+        with ExitStack() as stack:
+            try:
+                count = 0
+                for index, task in enumerate(tasks):
+                    count += 1
+                    if failed and atomic:
+                        yield {"index": index, "skipped": True}
+                        continue
+                    conn = connections.get(task.get("db_path", "test.db"))
+                    if conn is None:
+                        # A private connection: the batch may be consumed from several threads
+                        conn = stack.enter_context(self._pool(task).dedicated())
+                        conn.execute("BEGIN")
+                        connections[task.get("db_path", "test.db")] = conn
+                    result = self._batch_item(conn, task)
+                    failed = failed or "error" in result
+                    yield {"index": index, **result}
+
+                status = "rolled back" if failed and atomic else "committed"
+                for conn in connections.values():
+                    if failed and atomic:
+                        conn.rollback()
+                    else:
+                        conn.commit()
+                finished = True
+                yield {"batch": status, "items": count}
+            finally:
+                if not finished:
+                    for conn in connections.values():
+                        conn.rollback()
+
+    def _batch_item(self, conn, task: dict) -> dict:
+        query = task.get("query")
+        unsupported = [key for key in NON_BATCH_KEYS if task.get(key)]
+        if unsupported:
+            return {"error": f"'{unsupported[0]}' is not supported in a batch; run it as its own task."}
+        if not query:
+            return {"error": "Missing SQL query."}
+        conn.execute("SAVEPOINT batch_item")
+        try:
+            if task.get("many") is not None:
+                cursor = conn.executemany(query, task["many"])
+                result = {"status": "Query executed", "rowcount": cursor.rowcount}
+            else:
+                cursor = conn.execute(query, task.get("params") or ())
+                if cursor.description is not None:
+                    rows, truncated = self._fetch_limited(cursor, task)
+                    result = {"rows": rows}
+                    if truncated:
+                        result["truncated"] = True
+                else:
+                    result = {"status": "Query executed", "rowcount": cursor.rowcount}
+            cursor.close()
+            conn.execute("RELEASE batch_item")
+            return result
+        except Exception as e:
+            conn.execute("ROLLBACK TO batch_item")
+            conn.execute("RELEASE batch_item")
+            return {"error": str(e)}
+
     def _parse_prompt(self, prompt: str) -> dict:
         """
         Parses prompts like:
-        'query=SELECT * FROM users db_path=mydb.sqlite'
+        'query=SELECT * FROM users WHERE id = ? db_path=mydb.sqlite params=[1]'
+        or 'query="SELECT * FROM t WHERE a = 'x'" table=t', or a JSON object
+        with the same keys. An unquoted query ends at one of QUERY_END_KEYS,
+        so cursor/table/format/load/queries go before it or after one of
+        those (or the query is quoted). `params` (a list or an object for
+        named placeholders) and `many` (a list of those) are JSON.
         """
-        task = {}
-        parts = prompt.split()
-        for part in parts:
-            if '=' in part:
-                key, value = part.split('=', 1)
-                task[key.strip()] = value.strip()
-        return task
+        return parse_prompt(prompt, PROMPT_KEYS, JSON_KEYS, TEXT_KEYS, QUERY_END_KEYS)
+
+    def _pool(self, task: dict):
+        return get_pool(task.get("db_path", "test.db"), self.pragmas, self.statement_cache_size)
 
     def _handle(self, task: dict) -> dict:
         query = task.get("query")
-        db_path = task.get("db_path", "test.db")
 
+        if task.get("load"):
+            return self._load(task)
+        if task.get("queries"):
+            try:
+                return {"results": self._executor(task).run_batch(task["queries"])}
+            except Exception as e:
+                return {"error": str(e)}
         if not query:
             return {"error": "Missing SQL query."}
 
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute(query)
+            conn = self._pool(task).connection()
+        except Exception as e:
+            return {"error": str(e)}
 
-            if query.strip().lower().startswith("select"):
-                rows = cursor.fetchall()
-                result = {"rows": rows}
-            else:
+        try:
+            if task.get("many") is not None:
+                # One prepared statement, all parameter rows, one transaction
+                cursor = conn.executemany(query, task["many"])
                 conn.commit()
-                result = {"status": "Query executed"}
+                return {"status": "Query executed", "rowcount": cursor.rowcount}
+
+            if task.get("export"):
+                count = export_query(conn, query, task["export"], task.get("params"), task.get("format"),
+                                     int(task.get("batch_size", FETCH_BATCH_SIZE)))
+                return {"status": "Exported", "rows": count, "path": task["export"]}
+
+            if task.get("page_size"):
+                return self._fetch_page(conn, task)
 
-            conn.close()
+            trace = None
+            if task.get("instrument", self.instrument):
+                trace = self.profile.measure(conn, query, task.get("params"))
+            with trace or nullcontext():
+                cursor = conn.cursor()
+                cursor.execute(query, task.get("params") or ())
+
+                if query.strip().lower().startswith("select"):
+                    rows, truncated = self._fetch_limited(cursor, task)
+                    result = {"rows": rows}
+                    if truncated:
+                        result["truncated"] = True
+                else:
+                    conn.commit()
+                    result = {"status": "Query executed"}
+
+            if trace is not None:
+                # rowcount is -1 for statements that touch no rows (DDL)
+                returned = len(result["rows"]) if "rows" in result else max(cursor.rowcount, 0)
+                result["profile"] = trace.finish(returned)
+            cursor.close()
             return result
+        except Exception as e:
+            # Leave the pooled connection clean for the next caller
+            if conn.in_transaction:
+                conn.rollback()
+            return {"error": str(e)}
+
+    def _executor(self, task: dict) -> QueryExecutor:
+        db_path = task.get("db_path", "test.db")
+        evicted = None
+        with self._executors_lock:
+            executor = self._executors.get(db_path)
+            if executor is None:
+                executor = self._executors[db_path] = QueryExecutor(db_path, self.max_workers, self.pragmas)
+                if len(self._executors) > MAX_EXECUTORS:
+                    _, evicted = self._executors.popitem(last=False)
+            else:
+                self._executors.move_to_end(db_path)
+        if evicted is not None:
+            evicted.close()
+        return executor
+
+    def close(self) -> None:
+        """Stop the batch executors' worker threads"""
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def profile_report(self) -> dict:
+        """Aggregated instrumentation for this agent's session (slowest queries first)"""
+        return self.profile.report()
+
+    def _load(self, task: dict) -> dict:
+        """Bulk-load a CSV/NDJSON file (`load`) into `table`"""
+        if not task.get("table"):
+            return {"error": "Bulk load needs a target 'table'."}
+        try:
+            conn = self._pool(task).connection()
+            count = load_file(
+                conn, task["table"], task["load"], task.get("format"),
+                batch_size=int(task.get("batch_size", BATCH_SIZE)),
+                indexes=task.get("indexes"),
+                defer_indexes=bool(task.get("defer_indexes", False))
+            )
         except Exception as e:
             return {"error": str(e)}
+        return {"status": "Loaded", "rows": count, "table": task["table"]}
+
+    def stream(self, task: dict):
+        """Run a SELECT and return an iterator over its rows, fetched in fetchmany batches.
+
+        The query is checked and executed before this returns, so a bad task
+        raises here (ValueError or sqlite3.Error) rather than mid-stream.
+        Honours the same max_rows / max_bytes limits as _handle; memory stays
+        bounded by the batch size no matter how large the result is.
+        """
+        query = task.get("query")
+        if not query:
+            raise ValueError("Missing SQL query.")
+        batch_size = int(task.get("batch_size", FETCH_BATCH_SIZE))
+        max_rows, max_bytes = self._limits(task)
+
+        stack = ExitStack()
+        try:
+            conn = stack.enter_context(self._pool(task).dedicated())
+            cursor = conn.execute(query, task.get("params") or ())
+        except BaseException:
+            stack.close()
+            raise
+        return self._stream_rows(stack, cursor, batch_size, max_rows, max_bytes)
+
+    @staticmethod
+    def _stream_rows(stack, cursor, batch_size: int, max_rows, max_bytes):
+        with stack:
+            count = size = 0
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    return
+                for row in batch:
+                    size += _row_size(row)
+                    if (max_rows is not None and count >= max_rows) or (max_bytes is not None and size > max_bytes):
+                        return
+                    count += 1
+                    yield row
+
+    def _fetch_limited(self, cursor, task: dict) -> tuple:
+        """fetchall() with optional row and byte caps; returns (rows, truncated)"""
+        max_rows, max_bytes = self._limits(task)
+        if max_rows is None and max_bytes is None:
+            return cursor.fetchall(), False
+
+        rows = []
+        size = 0
+        while True:
+            batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not batch:
+                return rows, False
+            for row in batch:
+                size += _row_size(row)
+                if (max_rows is not None and len(rows) >= max_rows) or (max_bytes is not None and size > max_bytes):
+                    return rows, True
+                rows.append(row)
+
+    def _fetch_page(self, conn, task: dict) -> dict:
+        """Keyset pagination: rows after the cursor token, ordered by `order_by`"""
+        order_by = task.get("order_by")
+        if not order_by:
+            return {"error": "Pagination needs 'order_by' (a unique, sortable result column)."}
+        page_size = int(task["page_size"])
+        column = '"' + order_by.replace('"', '""') + '"'
+        inner = task["query"].strip().rstrip(";")
+        params = task.get("params") or ()
+        # Pager placeholders must match the query's style (named vs positional)
+        named = isinstance(params, dict)
+        after, limit = (":_after", ":_limit") if named else ("?", "?")
+
+        where = ""
+        extra = {"_limit": page_size}
+        if task.get("cursor"):
+            where = f" WHERE {column} > {after}"
+            extra["_after"] = json.loads(base64.urlsafe_b64decode(task["cursor"].encode()))
+        sql = f"SELECT * FROM ({inner}){where} ORDER BY {column} LIMIT {limit}"
+        if named:
+            cursor = conn.execute(sql, {**params, **extra})
+        else:
+            cursor = conn.execute(sql, (*params, *([extra["_after"]] if where else []), page_size))
+
+        rows = cursor.fetchall()
+        names = [d[0] for d in cursor.description]
+        next_cursor = None
+        if len(rows) == page_size:
+            last_key = rows[-1][names.index(order_by)]
+            next_cursor = base64.urlsafe_b64encode(json.dumps(last_key).encode()).decode()
+        return {"rows": rows, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _limits(task: dict) -> tuple:
+        max_rows = task.get("max_rows")
+        max_bytes = task.get("max_bytes")
+        return (int(max_rows) if max_rows is not None else None,
+                int(max_bytes) if max_bytes is not None else None)
+
+
+def _close_executors(executors: dict, lock) -> None:
+    with lock:
+        pending = list(executors.values())
+        executors.clear()
+    for executor in pending:
+        executor.close()
+
+
+def _row_size(row) -> int:
+    """Rough in-memory size of a row, for byte limits"""
+    return sum(len(v) if isinstance(v, (str, bytes)) else 8 for v in row)
@@ -0,0 +1,177 @@
+import csv
+import json
+import os
+import sqlite3
+from itertools import islice
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
+    parquet = None
+
+BULK_FORMATS = ("csv", "ndjson", "parquet")
+BATCH_SIZE = 5000
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def detect_format(path: str, fmt=None) -> str:
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    fmt = {"jsonl": "ndjson", "pq": "parquet"}.get(fmt, fmt)
+    if fmt not in BULK_FORMATS:
+        raise ValueError(f"Unsupported bulk format '{fmt}' (expected one of {', '.join(BULK_FORMATS)})")
+    return fmt
+
+
+def _read_csv(path: str):
+    """(columns, row iterator) for a CSV file with a header row"""
+    handle = open(path, newline="", encoding="utf-8")
+    reader = csv.reader(handle)
+    try:
+        columns = next(reader)
+    except StopIteration:
+        handle.close()
+        return [], None
+
+    def rows():
+        with handle:
+            for row in reader:
+                yield [value if value != "" else None for value in row]
+    return columns, rows()
+
+
+def _read_ndjson(path: str):
+    """(columns, row iterator) for NDJSON; columns come from the first object"""
+    handle = open(path, encoding="utf-8")
+    lines = (line for line in handle if line.strip())
+    first = next(lines, None)
+    if first is None:
+        handle.close()
+        return [], None
+    columns = list(json.loads(first))
+
+    def rows():
+        with handle:
+            for line in _chain(first, lines):
+                record = json.loads(line)
+                yield [_scalar(record.get(column)) for column in columns]
+    return columns, rows()
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def _scalar(value):
+    # Nested values have no SQLite type; store them as JSON text
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+
+
+def _table_indexes(conn: sqlite3.Connection, table: str) -> list:
+    return conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    ).fetchall()
+
+
+def load_file(conn: sqlite3.Connection, table: str, path: str, fmt=None, batch_size=BATCH_SIZE,
+              indexes=None, defer_indexes=False) -> int:
+    """Stream a CSV/NDJSON file into `table` in one transaction; returns the row count.
+
+    The table is created (untyped columns) when missing, so CSV values stay
+    text unless the table already exists with typed columns. Rows go through a
+    single prepared INSERT with executemany in batches. With `defer_indexes`
+    the table's existing indexes are dropped for the load and rebuilt after;
+    `indexes` (column names or lists of them) are created once the data is in.
+    """
+    fmt = detect_format(path, fmt)
+    if fmt == "parquet":
+        raise ValueError("Loading parquet is not supported; use csv or ndjson")
+    columns, rows = (_read_csv if fmt == "csv" else _read_ndjson)(path)
+    if not columns:
+        return 0
+
+    quoted_table = quote_identifier(table)
+    column_list = ", ".join(quote_identifier(c) for c in columns)
+    insert = f"INSERT INTO {quoted_table} ({column_list}) VALUES ({', '.join('?' * len(columns))})"
+    count = 0
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {quoted_table} ({column_list})")
+        deferred = _table_indexes(conn, table) if defer_indexes else []
+        for name, _ in deferred:
+            conn.execute(f"DROP INDEX {quote_identifier(name)}")
+
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            conn.executemany(insert, batch)
+            count += len(batch)
+
+        for _, sql in deferred:
+            conn.execute(sql)
+        for index in indexes or ():
+            index_columns = [index] if isinstance(index, str) else list(index)
+            name = quote_identifier(f"idx_{table}_{'_'.join(index_columns)}")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {quoted_table} "
+                         f"({', '.join(quote_identifier(c) for c in index_columns)})")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        rows.close()
+    return count
+
+
+def export_query(conn: sqlite3.Connection, query: str, path: str, params=(), fmt=None,
+                 batch_size=BATCH_SIZE) -> int:
+    """Stream the rows of `query` into a CSV/NDJSON/Parquet file; returns the row count"""
+    fmt = detect_format(path, fmt)
+    if fmt == "parquet" and parquet is None:
+        raise ImportError("Exporting parquet requires pyarrow (pip install pyarrow)")
+
+    cursor = conn.execute(query, params or ())
+    columns = [d[0] for d in cursor.description]
+    batches = iter(lambda: cursor.fetchmany(batch_size), [])
+    count = 0
+
+    if fmt == "parquet":
+        writer = None
+        try:
+            for batch in batches:
+                table = pyarrow.Table.from_pylist([dict(zip(columns, row)) for row in batch])
+                if writer is None:
+                    writer = parquet.ParquetWriter(path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+                count += len(batch)
+            if writer is None:
+                parquet.write_table(pyarrow.table({c: [] for c in columns}), path)
+        finally:
+            if writer is not None:
+                writer.close()
+        return count
+
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        if fmt == "csv":
+            writer = csv.writer(handle)
+            writer.writerow(columns)
+            for batch in batches:
+                writer.writerows(batch)
+                count += len(batch)
+        else:
+            for batch in batches:
+                handle.writelines(
+                    json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n" for row in batch
+                )
+                count += len(batch)
+    return count
@@ -0,0 +1,109 @@
+import os
+import queue
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from urllib.parse import quote
+
+from agents.sqlite_pool import DEFAULT_PRAGMAS, ConnectionPool, get_pool
+
+_READ_RE = re.compile(r"^\s*(?:select|values|explain)\b", re.IGNORECASE)
+_WITH_RE = re.compile(r"^\s*with\b", re.IGNORECASE)
+_WRITE_RE = re.compile(r"\b(?:insert|update|delete|replace)\b", re.IGNORECASE)
+
+
+def is_read_only(query: str) -> bool:
+    """Whether a statement only reads (SELECT, or a CTE without DML)"""
+    if _READ_RE.match(query):
+        return True
+    return bool(_WITH_RE.match(query)) and not _WRITE_RE.search(query)
+
+
+class QueryExecutor:
+    """Runs a batch of queries against one database, reads in parallel.
+
+    Read-only statements go to a thread pool whose workers each hold their
+    own `mode=ro` connection; in WAL mode they read while a write is in flight.
+    Everything else is serialized through a single writer thread, so there
+    is never more than one writer contending for the lock.
+    """
+
+    def __init__(self, db_path: str, max_workers=8, pragmas=None):
+        self.db_path = db_path
+        self.pragmas = pragmas
+        self._write_pool = get_pool(db_path, pragmas)
+        # Opening once read-write creates the file (switching a new file to WAL, which persists)
+        with self._write_pool.dedicated():
+            pass
+
+        read_pragmas = {k: v for k, v in (DEFAULT_PRAGMAS if pragmas is None else pragmas).items()
+                        if k not in ("journal_mode", "synchronous")}
+        uri = f"file:{quote(os.path.abspath(db_path))}?mode=ro"
+        self._read_pool = ConnectionPool(uri, read_pragmas, uri=True)
+        self._readers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sql-read")
+
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="sql-write", daemon=True)
+        self._writer.start()
+
+    def submit(self, query: str, params=None) -> Future:
+        if is_read_only(query):
+            return self._readers.submit(self._read, query, params)
+        future = Future()
+        self._writes.put((query, params, future))
+        return future
+
+    def run_batch(self, queries) -> list:
+        """Run queries (strings or {"query", "params"} dicts); results in input order.
+
+        The batch keeps its statement order across reads and writes: a run of
+        consecutive reads goes out in parallel, but only once the writes
+        before it have committed, and a write waits for the reads before it.
+        """
+        futures = []
+        segment, segment_reads = [], None
+        for item in queries:
+            if isinstance(item, str):
+                item = {"query": item}
+            read = is_read_only(item["query"])
+            if segment and read != segment_reads:
+                wait(segment)
+                segment = []
+            future = self.submit(item["query"], item.get("params"))
+            futures.append(future)
+            segment.append(future)
+            segment_reads = read
+        return [future.result() for future in futures]
+
+    def _read(self, query: str, params) -> dict:
+        try:
+            cursor = self._read_pool.connection().execute(query, params or ())
+            rows = cursor.fetchall()
+            cursor.close()
+            return {"rows": rows}
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._writes.get()
+            if item is None:
+                return
+            query, params, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            conn = self._write_pool.connection()
+            try:
+                cursor = conn.execute(query, params or ())
+                conn.commit()
+                future.set_result({"status": "Query executed", "rowcount": cursor.rowcount})
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                future.set_result({"error": str(e)})
+
+    def close(self) -> None:
+        self._writes.put(None)
+        self._writer.join()
+        self._readers.shutdown(wait=True)
+        self._read_pool.close()
@@ -0,0 +1,183 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+# The progress handler fires every N virtual machine instructions
+PROGRESS_INTERVAL = 100
+
+_EXPLAINABLE = ("select", "with", "insert", "update", "delete", "replace")
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$")
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?(?!WHERE|JOIN|ON|SET|ORDER|GROUP|LIMIT|INNER|LEFT|CROSS|NATURAL|USING|VALUES)([A-Za-z_]\w*))?",
+                       re.IGNORECASE)
+_WHERE_RE = re.compile(r"\bWHERE\b(.*?)(?=\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|\bHAVING\b|$)", re.IGNORECASE | re.DOTALL)
+_ORDER_RE = re.compile(r"\bORDER\s+BY\b(.*?)(?=\bLIMIT\b|$)", re.IGNORECASE | re.DOTALL)
+_PREDICATE_RE = re.compile(r"([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)?)\s*(?:=|<|>|!=|\bIN\b|\bLIKE\b|\bBETWEEN\b|\bIS\b)",
+                           re.IGNORECASE)
+
+
+def normalize_query(query: str) -> str:
+    """Query text with literals replaced by ?, for grouping repeated queries"""
+    return " ".join(_LITERAL_RE.sub("?", query).split())
+
+
+def _aliases(query: str) -> dict:
+    """alias (or table name) -> table name for every FROM/JOIN/UPDATE target"""
+    aliases = {}
+    for table, alias in _TABLE_RE.findall(query):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def _columns(clause_re, predicate, query: str) -> list:
+    match = clause_re.search(query)
+    if not match:
+        return []
+    return predicate(match.group(1))
+
+
+def _where_columns(text: str) -> list:
+    return list(dict.fromkeys(_PREDICATE_RE.findall(text)))
+
+
+def _order_columns(text: str) -> list:
+    columns = []
+    for term in text.split(","):
+        words = term.split()
+        if words and re.fullmatch(r"[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)?", words[0]):
+            columns.append(words[0])
+    return columns
+
+
+class QueryTrace:
+    """Measures one statement: wall time, VM steps and its query plan"""
+
+    def __init__(self, session, conn: sqlite3.Connection, query: str, params=()):
+        self.session = session
+        self.conn = conn
+        self.query = query
+        self.params = params or ()
+        self.steps = 0
+        self.elapsed_ms = None
+
+    def _tick(self):
+        self.steps += PROGRESS_INTERVAL
+        return 0
+
+    def __enter__(self):
+        self.conn.set_progress_handler(self._tick, PROGRESS_INTERVAL)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        self.conn.set_progress_handler(None, 0)
+        return False
+
+    def finish(self, rows_returned=None) -> dict:
+        """Profile dict for the result; also folds it into the session"""
+        plan = self._plan()
+        full_scans, temp_sorts = [], False
+        for detail in plan:
+            match = _SCAN_RE.match(detail)
+            if match:
+                full_scans.append(match.group(2) or match.group(1))
+            elif detail.startswith("USE TEMP B-TREE FOR ORDER BY"):
+                temp_sorts = True
+
+        suggestions = self._suggest(full_scans, temp_sorts)
+        profile = {
+            "elapsed_ms": self.elapsed_ms,
+            "rows_returned": rows_returned,
+            # Approximate: counted in PROGRESS_INTERVAL increments; a proxy for rows scanned
+            "vm_steps": self.steps,
+            "plan": plan,
+            "full_scans": full_scans,
+            "index_suggestions": suggestions,
+        }
+        self.session.record(self.query, profile)
+        return profile
+
+    def _plan(self) -> list:
+        if not self.query.lstrip().lower().startswith(_EXPLAINABLE):
+            return []
+        try:
+            return [row[3] for row in self.conn.execute("EXPLAIN QUERY PLAN " + self.query, self.params)]
+        except sqlite3.Error:
+            return []
+
+    def _suggest(self, full_scans: list, temp_sorts: bool) -> list:
+        """CREATE INDEX statements for scanned tables filtered/sorted on their columns"""
+        if not full_scans and not temp_sorts:
+            return []
+        aliases = _aliases(self.query)
+        where = _columns(_WHERE_RE, _where_columns, self.query)
+        order = _columns(_ORDER_RE, _order_columns, self.query)
+        single_table = len(set(aliases.values())) == 1
+
+        suggestions = []
+        targets = full_scans or list(dict.fromkeys(aliases))
+        for alias in targets:
+            table = aliases.get(alias, alias)
+            known = self._table_columns(table)
+            columns = []
+            for column in where + order:
+                prefix, _, name = column.rpartition(".")
+                if (prefix == alias or (not prefix and single_table)) and name in known and name not in columns:
+                    columns.append(name)
+            if columns:
+                suggestions.append(f"CREATE INDEX idx_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})")
+        return suggestions
+
+    def _table_columns(self, table: str) -> set:
+        try:
+            return {row[1] for row in self.conn.execute(f'PRAGMA table_info("{table}")')}
+        except sqlite3.Error:
+            return set()
+
+
+class SessionProfile:
+    """Per-agent aggregate of instrumented queries and index suggestions"""
+
+    def __init__(self):
+        self.queries = {}
+        self.suggestions = Counter()
+        self._lock = threading.Lock()
+
+    def measure(self, conn: sqlite3.Connection, query: str, params=()) -> QueryTrace:
+        return QueryTrace(self, conn, query, params)
+
+    def record(self, query: str, profile: dict) -> None:
+        key = normalize_query(query)
+        with self._lock:
+            stats = self.queries.setdefault(key, {
+                "query": key, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "rows_returned": 0, "vm_steps": 0, "full_scans": 0,
+            })
+            stats["count"] += 1
+            stats["total_ms"] = round(stats["total_ms"] + profile["elapsed_ms"], 3)
+            stats["max_ms"] = max(stats["max_ms"], profile["elapsed_ms"])
+            stats["rows_returned"] += profile["rows_returned"] or 0
+            stats["vm_steps"] += profile["vm_steps"]
+            stats["full_scans"] += bool(profile["full_scans"])
+            self.suggestions.update(profile["index_suggestions"])
+
+    def report(self) -> dict:
+        """Queries by total time (slowest first) and suggestions by how often they came up"""
+        with self._lock:
+            queries = sorted((dict(stats) for stats in self.queries.values()),
+                             key=lambda stats: stats["total_ms"], reverse=True)
+            return {
+                "queries": queries,
+                "total_ms": round(sum(stats["total_ms"] for stats in queries), 3),
+                "index_suggestions": [{"sql": sql, "queries": count} for sql, count in self.suggestions.most_common()],
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.queries.clear()
+            self.suggestions.clear()
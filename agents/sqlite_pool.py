@@ -0,0 +1,140 @@
+import atexit
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+DEFAULT_PRAGMAS = {
+    "cache_size": -64000,      # KiB when negative: ~64 MB page cache
+    "mmap_size": 268435456,    # 256 MB
+    "temp_store": "MEMORY",
+}
+# With the defaults, only database files the pool creates are switched to WAL
+# (it persists in the file); existing databases keep their journal mode
+CREATE_PRAGMAS = {"journal_mode": "WAL"}
+# synchronous=NORMAL is only crash-safe in WAL mode
+WAL_PRAGMAS = {"synchronous": "NORMAL"}
+
+
+class ConnectionPool:
+    """Warm SQLite connections for one database file, one per thread.
+
+    Each thread gets its own connection (SQLite connections are not safe to
+    share between threads), opened once with the configured PRAGMAs,
+    health-checked on reuse and closed when its thread exits or by close().
+    Explicit `pragmas` are applied as given; the defaults add WAL only for a
+    database file the pool creates.
+    """
+
+    def __init__(self, db_path: str, pragmas=None, cached_statements=128, uri=False):
+        self.db_path = db_path
+        self.defaults = pragmas is None
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.cached_statements = cached_statements
+        self.uri = uri
+        self._local = threading.local()
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._healthy(conn):
+            return conn
+        if conn is not None:
+            self._discard(conn)
+        conn = self._open()
+        self._local.conn = conn
+        # Thread-local storage drops the reference when the thread exits; also close the connection then
+        weakref.finalize(threading.current_thread(), self._release, conn)
+        return conn
+
+    @contextmanager
+    def dedicated(self):
+        """A private connection with the pool's settings, closed on exit.
+
+        For long-lived cursors (e.g. streamed results) that may be consumed
+        from other threads while the thread's pooled connection is in use.
+        """
+        conn = self._open()
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                self._connections.discard(conn)
+            conn.close()
+
+    def _open(self) -> sqlite3.Connection:
+        # Affinity is enforced by the thread-local; the flag only lets close() run anywhere
+        creating = (self.defaults and not self.uri and self.db_path != ":memory:"
+                    and not os.path.exists(self.db_path))
+        conn = sqlite3.connect(self.db_path, cached_statements=self.cached_statements, uri=self.uri,
+                               check_same_thread=False)
+        pragmas = dict(self.pragmas)
+        if creating:
+            pragmas.update(CREATE_PRAGMAS)
+        for name, value in pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        if self.defaults and conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal":
+            for name, value in WAL_PRAGMAS.items():
+                conn.execute(f"PRAGMA {name}={value}")
+        with self._lock:
+            self._connections.add(conn)
+        return conn
+
+    @staticmethod
+    def _healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        self._release(conn)
+        self._local.conn = None
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._connections.discard(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        """Close every connection this pool opened (call once its threads are done)"""
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, pragmas=None, cached_statements=128) -> ConnectionPool:
+    """Shared pool for a database path (created on first use)"""
+    key = (db_path, tuple(sorted((DEFAULT_PRAGMAS if pragmas is None else pragmas).items())), cached_statements)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(db_path, pragmas, cached_statements)
+        return pool
+
+
+def close_all_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_all_pools)
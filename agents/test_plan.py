@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import re
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+PLAN_SCHEMA_VERSION = 1
+HTTP_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+PLAN_OPTIONS = ("concurrency", "per_host_limit")
+ENDPOINT_OPTIONS = ("depends_on", "sequential", "load", "capture_limit", "spill_dir")
+
+
+def compile_plan(test_plan: dict) -> dict:
+    """Validate a raw plan and normalise it into the versioned compiled format.
+
+    Missing optional fields get the same defaults execution would use;
+    structural problems raise ValueError.
+    """
+    if not isinstance(test_plan, dict):
+        raise ValueError("Test plan must be a JSON object")
+    endpoints = test_plan.get("endpoints", [])
+    if not isinstance(endpoints, list):
+        raise ValueError("Test plan 'endpoints' must be a list")
+
+    compiled = {
+        "schema_version": PLAN_SCHEMA_VERSION,
+        "base_url": test_plan.get("base_url") or "",
+        "endpoints": [compile_endpoint(i, e) for i, e in enumerate(endpoints)],
+    }
+    for option in PLAN_OPTIONS:
+        if test_plan.get(option) is not None:
+            compiled[option] = test_plan[option]
+    return compiled
+
+
+def compile_endpoint(index: int, endpoint: dict) -> dict:
+    """Validate and normalise the endpoint at plan position `index`"""
+    if not isinstance(endpoint, dict):
+        raise ValueError(f"Endpoint {index + 1} must be a JSON object")
+    if not endpoint.get("path"):
+        raise ValueError(f"Endpoint {index + 1} is missing 'path'")
+
+    method = str(endpoint.get("method") or "GET").upper()
+    if method not in HTTP_METHODS:
+        raise ValueError(f"Endpoint {index + 1} has unsupported method '{method}'")
+
+    validations = endpoint.get("validations") or []
+    if isinstance(validations, (str, dict)):
+        validations = [validations]
+
+    compiled = {
+        "name": str(endpoint.get("name") or f"Test {index + 1}"),
+        "method": method,
+        "path": str(endpoint["path"]),
+        "headers": dict(endpoint.get("headers") or {}),
+        "data": endpoint.get("data") or {},
+        "expected_status": int(endpoint.get("expected_status", 200)),
+        "validations": [v if isinstance(v, dict) else str(v) for v in validations],
+    }
+    for option in ENDPOINT_OPTIONS:
+        if endpoint.get(option) is not None:
+            compiled[option] = endpoint[option]
+    return compiled
+
+
+def save_plan(test_plan: dict, path: str) -> dict:
+    """Compile and write a plan; '.msgpack' paths use msgpack when installed"""
+    compiled = compile_plan(test_plan)
+    if path.endswith(".msgpack"):
+        if msgpack is None:
+            raise ValueError("msgpack is not installed; save the plan as .json instead")
+        with open(path, "wb") as f:
+            f.write(msgpack.packb(compiled))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(compiled, f, indent=2)
+    return compiled
+
+
+def load_plan(path: str) -> dict:
+    """Read a compiled plan, rejecting other schema versions"""
+    if path.endswith(".msgpack"):
+        if msgpack is None:
+            raise ValueError("msgpack is not installed; cannot read " + path)
+        with open(path, "rb") as f:
+            compiled = msgpack.unpackb(f.read())
+    else:
+        with open(path, encoding="utf-8") as f:
+            compiled = json.load(f)
+
+    version = compiled.get("schema_version") if isinstance(compiled, dict) else None
+    if version != PLAN_SCHEMA_VERSION:
+        raise ValueError(f"Unsupported plan schema version: {version}")
+    return compiled
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so trivially reformatted prompts share a plan"""
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+class PlanCache:
+    """Directory of compiled plans keyed by a hash of the normalised prompt"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, prompt: str) -> str:
+        digest = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, prompt: str):
+        path = self._path(prompt)
+        if not os.path.exists(path):
+            return None
+        try:
+            return load_plan(path)
+        except (OSError, ValueError):
+            # Stale schema or a half-written file: plan again
+            return None
+
+    def put(self, prompt: str, test_plan: dict) -> dict:
+        path = self._path(prompt)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        compiled = save_plan(test_plan, tmp_path)
+        os.replace(tmp_path, path)
+        return compiled
@@ -0,0 +1,338 @@
+import json
+import re
+from abc import ABC, abstractmethod
+from functools import cached_property
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+_CONTAIN_RE = re.compile(r'contain[s]?\s+["\']?([^"\'\n]+)["\']?')
+_REGEX_RE = re.compile(r'match(?:es)?\s+(?:regex|pattern)\s+/(.+)/([imsx]*)\s*$', re.IGNORECASE)
+_LATENCY_RE = re.compile(r'time\b.*?(?:under|below|less than|within|<=?)\s*(\d+(?:\.\d+)?)\s*ms', re.IGNORECASE)
+_JSONPATH_RE = re.compile(r'^\s*(\$[^\s=]*)\s*(?:==|should (?:be|equal)|equals)\s*(.+?)\s*$', re.IGNORECASE)
+_PATH_TOKEN_RE = re.compile(r'\.([A-Za-z_][\w-]*)|\[(\d+)\]|\[[\'"]([^\'"]+)[\'"]\]')
+_UNSET = object()
+
+
+class ResponseView:
+    """Lazily derived views of one response, each computed at most once.
+
+    `response` needs `text` and `json()`; `response_time` is in ms.
+    """
+
+    def __init__(self, response, response_time=None):
+        self.response = response
+        self.response_time = response_time
+
+    @cached_property
+    def text(self) -> str:
+        return self.response.text
+
+    @cached_property
+    def lower_text(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def json(self):
+        try:
+            return self.response.json()
+        except Exception:
+            return _UNSET
+
+
+class Rule(ABC):
+    """A compiled validation; evaluate() returns a ✅/❌ message"""
+
+    # Whether the rule has to see the complete body (not just a prefix)
+    needs_body = False
+
+    @abstractmethod
+    def evaluate(self, view: ResponseView) -> str:
+        """The ✅/❌ message for one response"""
+
+
+class StaticRule(Rule):
+    """Validation that always reports a fixed message (e.g. free-text checks)"""
+
+    def __init__(self, message: str):
+        self.message = message
+
+    def evaluate(self, view):
+        return self.message
+
+
+class SubstringRule(Rule):
+    """Case-insensitive 'response contains X' check.
+
+    RuleSet answers these for all substring rules in one pass; evaluate()
+    is the standalone path.
+    """
+
+    def __init__(self, expected: str):
+        self.expected = expected.lower()
+
+    def message(self, found: bool) -> str:
+        if found:
+            return f"✅ Response contains '{self.expected}'"
+        return f"❌ Response does not contain '{self.expected}'"
+
+    def evaluate(self, view):
+        return self.message(self.expected in view.lower_text)
+
+
+class RegexRule(Rule):
+    needs_body = True
+
+    def __init__(self, pattern: str, flags: str = ""):
+        self.pattern = pattern
+        re_flags = 0
+        for flag in flags.lower():
+            re_flags |= {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}[flag]
+        self.regex = re.compile(pattern, re_flags)
+
+    def evaluate(self, view):
+        if self.regex.search(view.text):
+            return f"✅ Response matches /{self.pattern}/"
+        return f"❌ Response does not match /{self.pattern}/"
+
+
+class JSONPathRule(Rule):
+    """Equality check on a value addressed by a simple path like $.data[0].id"""
+
+    needs_body = True
+
+    def __init__(self, path: str, expected):
+        self.path = path
+        self.expected = expected
+        self.steps = _compile_path(path)
+
+    def evaluate(self, view):
+        value = view.json
+        if value is _UNSET:
+            return f"❌ {self.path}: response is not JSON"
+        for step in self.steps:
+            try:
+                value = value[step]
+            except (KeyError, IndexError, TypeError):
+                return f"❌ {self.path} not found in response"
+        if value == self.expected:
+            return f"✅ {self.path} equals {json.dumps(self.expected)}"
+        return f"❌ {self.path} is {json.dumps(value)}, expected {json.dumps(self.expected)}"
+
+
+class SchemaRule(Rule):
+    """Checks the JSON body against a small JSON Schema subset.
+
+    Supports 'type', 'properties', 'required', 'items' and 'enum'.
+    """
+
+    needs_body = True
+
+    _TYPES = {
+        "object": dict, "array": list, "string": str, "boolean": bool,
+        "integer": int, "number": (int, float), "null": type(None),
+    }
+
+    def __init__(self, schema: dict):
+        self.schema = schema
+
+    def evaluate(self, view):
+        value = view.json
+        if value is _UNSET:
+            return "❌ Response is not JSON"
+        problem = self._check(value, self.schema, "$")
+        if problem:
+            return f"❌ Response schema mismatch: {problem}"
+        return "✅ Response matches schema"
+
+    def _check(self, value, schema, path):
+        expected_type = schema.get("type")
+        if expected_type:
+            python_type = self._TYPES.get(expected_type)
+            is_bool = isinstance(value, bool) and expected_type in ("integer", "number")
+            if python_type is None or not isinstance(value, python_type) or is_bool:
+                return f"{path} expected {expected_type}"
+        if "enum" in schema and value not in schema["enum"]:
+            return f"{path} not one of {schema['enum']}"
+        if isinstance(value, dict):
+            for key in schema.get("required", []):
+                if key not in value:
+                    return f"{path}.{key} is required"
+            for key, sub_schema in schema.get("properties", {}).items():
+                if key in value:
+                    problem = self._check(value[key], sub_schema, f"{path}.{key}")
+                    if problem:
+                        return problem
+        if isinstance(value, list) and "items" in schema:
+            for i, item in enumerate(value):
+                problem = self._check(item, schema["items"], f"{path}[{i}]")
+                if problem:
+                    return problem
+        return None
+
+
+class LatencyRule(Rule):
+    def __init__(self, max_ms: float):
+        self.max_ms = float(max_ms)
+
+    def evaluate(self, view):
+        if view.response_time is None:
+            return "❌ Response time not available"
+        if view.response_time <= self.max_ms:
+            return f"✅ Response time {view.response_time}ms within {self.max_ms:g}ms"
+        return f"❌ Response time {view.response_time}ms exceeds {self.max_ms:g}ms"
+
+
+def _compile_path(path: str) -> list:
+    rest = path[1:]
+    steps = []
+    pos = 0
+    while pos < len(rest):
+        match = _PATH_TOKEN_RE.match(rest, pos)
+        if not match:
+            raise ValueError(f"Unsupported JSONPath: {path}")
+        key, index, quoted = match.groups()
+        steps.append(int(index) if index is not None else (key or quoted))
+        pos = match.end()
+    return steps
+
+
+def _literal(text: str):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text.strip("\"'")
+
+
+def compile_rule(validation) -> Rule:
+    """Turn one plan validation (free text or a typed dict) into a Rule"""
+    if isinstance(validation, dict):
+        kind = validation.get("type")
+        if kind == "contains":
+            return SubstringRule(str(validation["value"]))
+        if kind == "regex":
+            return RegexRule(validation["pattern"], validation.get("flags", ""))
+        if kind == "jsonpath":
+            return JSONPathRule(validation["path"], validation.get("equals"))
+        if kind == "schema":
+            return SchemaRule(validation["schema"])
+        if kind == "latency":
+            return LatencyRule(validation["max_ms"])
+        raise ValueError(f"Unknown validation type: {kind}")
+
+    validation = str(validation)
+    validation_lower = validation.lower()
+
+    if "contain" in validation_lower:
+        match = _CONTAIN_RE.search(validation_lower)
+        if match:
+            return SubstringRule(match.group(1).strip())
+
+    match = _REGEX_RE.search(validation)
+    if match:
+        return RegexRule(match.group(1), match.group(2))
+
+    match = _JSONPATH_RE.match(validation)
+    if match:
+        return JSONPathRule(match.group(1), _literal(match.group(2)))
+
+    match = _LATENCY_RE.search(validation)
+    if match:
+        return LatencyRule(match.group(1))
+
+    if "status" in validation_lower and "should be" in validation_lower:
+        # Status validation already handled by the status code check
+        return StaticRule("✅ Status validation completed")
+
+    return StaticRule(f"✅ Validation: {validation}")
+
+
+class _SubstringMatcher:
+    """Finds which of many needles occur in a text.
+
+    Uses a single Aho-Corasick pass when pyahocorasick is installed; otherwise
+    falls back to per-needle `in` checks, which run at C speed.
+    """
+
+    def __init__(self, needles):
+        self.needles = set(needles)
+        self.automaton = None
+        if ahocorasick is not None and len(self.needles) > 1:
+            self.automaton = ahocorasick.Automaton()
+            for needle in self.needles:
+                self.automaton.add_word(needle, needle)
+            self.automaton.make_automaton()
+
+    def find(self, text: str) -> set:
+        if self.automaton is None:
+            return {needle for needle in self.needles if needle in text}
+        found = set()
+        for _, needle in self.automaton.iter(text):
+            found.add(needle)
+            if len(found) == len(self.needles):
+                break
+        return found
+
+
+class RuleSet:
+    """All validations of one endpoint, compiled once and reused per response"""
+
+    def __init__(self, validations):
+        self.rules = []
+        for validation in validations:
+            try:
+                self.rules.append(compile_rule(validation))
+            except Exception as e:
+                self.rules.append(StaticRule(f"❌ Validation failed: {validation} - {str(e)}"))
+        self.substrings = [rule for rule in self.rules if isinstance(rule, SubstringRule)]
+        self.matcher = _SubstringMatcher(r.expected for r in self.substrings) if self.substrings else None
+
+    def streaming_validator(self):
+        """Validator to feed body text incrementally, or None if not needed"""
+        return StreamingValidator(self.matcher) if self.matcher else None
+
+    def evaluate(self, response, response_time=None, found=None, truncated=False) -> list:
+        """Return one ✅/❌ message per validation, in plan order
+
+        `found` is the substring set from a StreamingValidator that already saw
+        the whole body; with `truncated`, rules needing the full body report
+        that they could not run against the captured prefix.
+        """
+        view = ResponseView(response, response_time)
+        messages = []
+        for rule in self.rules:
+            try:
+                if isinstance(rule, SubstringRule):
+                    if found is None:
+                        found = self.matcher.find(view.lower_text)
+                    messages.append(rule.message(rule.expected in found))
+                elif truncated and rule.needs_body:
+                    messages.append(f"❌ Validation skipped: body truncated after {len(view.text)} characters")
+                else:
+                    messages.append(rule.evaluate(view))
+            except Exception as e:
+                messages.append(f"❌ Validation failed: {str(e)}")
+        return messages
+
+
+class StreamingValidator:
+    """Runs substring matching over body text that arrives in chunks.
+
+    The last few characters of each chunk are carried over so needles that
+    straddle a chunk boundary are still found.
+    """
+
+    def __init__(self, matcher: _SubstringMatcher):
+        self.matcher = matcher
+        self.overlap = max(len(needle) for needle in matcher.needles) - 1
+        self.found = set()
+        self._tail = ""
+
+    def feed(self, text: str) -> None:
+        if not text or len(self.found) == len(self.matcher.needles):
+            return
+        window = self._tail + text.lower()
+        self.found |= self.matcher.find(window)
+        self._tail = window[-self.overlap:] if self.overlap else ""
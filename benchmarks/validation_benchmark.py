@@ -0,0 +1,81 @@
+"""Benchmark compiled validation rules against the old per-string validator.
+
+Run from the repository root:
+    python -m benchmarks.validation_benchmark
+"""
+import json
+import random
+import re
+import string
+import time
+from agents.validation_rules import RuleSet
+
+BODY_SIZE = 1024 * 1024
+RULE_COUNT = 100
+ROUNDS = 5
+
+
+class FakeResponse:
+    """requests-like response that re-decodes its body on every .text access"""
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self.status_code = 200
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def legacy_validate(response, validation):
+    """The validator APIAgent used before rules were compiled"""
+    response_text = response.text.lower()
+    validation_lower = validation.lower()
+    if "contain" in validation_lower:
+        match = re.search(r'contain[s]?\s+["\']?([^"\'\n]+)["\']?', validation_lower)
+        if match:
+            expected = match.group(1).strip()
+            if expected in response_text:
+                return f"✅ Response contains '{expected}'"
+            return f"❌ Response does not contain '{expected}'"
+    return f"✅ Validation: {validation}"
+
+
+def build_case():
+    rng = random.Random(42)
+    records = [
+        {"id": i, "name": "".join(rng.choices(string.ascii_letters, k=12)), "tags": ["alpha", "beta"]}
+        for i in range(BODY_SIZE // 60)
+    ]
+    body = json.dumps({"data": records})[:BODY_SIZE].encode()
+    present = [records[rng.randrange(len(records))]["name"] for _ in range(RULE_COUNT // 2)]
+    missing = ["".join(rng.choices(string.ascii_letters, k=12)) for _ in range(RULE_COUNT - len(present))]
+    validations = [f"response should contain '{needle}'" for needle in present + missing]
+    return FakeResponse(body), validations
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = fn()
+    return (time.perf_counter() - start) / ROUNDS * 1000, result
+
+
+def main():
+    response, validations = build_case()
+    rule_set = RuleSet(validations)
+
+    legacy_ms, legacy = timed(lambda: [legacy_validate(response, v) for v in validations])
+    compiled_ms, compiled = timed(lambda: rule_set.evaluate(response))
+    assert legacy == compiled, "compiled rules disagree with the legacy validator"
+
+    print(f"body: {len(response.content) / 1024 / 1024:.1f} MB, rules: {len(validations)}, rounds: {ROUNDS}")
+    print(f"legacy validator : {legacy_ms:8.1f} ms/response")
+    print(f"compiled RuleSet : {compiled_ms:8.1f} ms/response ({legacy_ms / compiled_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import json
+
+
+class StreamingArrayParser:
+    """Incrementally pulls objects out of one array in a streamed JSON document.
+
+    Feed text chunks as they arrive; every object in the top-level array named
+    `array_key` is returned as soon as its closing brace is seen. Top-level
+    string fields (e.g. "base_url") are exposed through `fields`. Text before
+    the first '{' is ignored, matching how complete responses are extracted.
+    Other top-level scalars (numbers, booleans, null) land in `fields` once
+    the comma or brace after them arrives.
+    """
+
+    def __init__(self, array_key="endpoints"):
+        self.array_key = array_key
+        self.fields = {}
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string = []
+        self._last_string = None
+        self._pending_key = None
+        self._scalar = []
+        self._in_array = False
+        self._capture = None
+        self._started = False
+
+    def feed(self, text: str) -> list:
+        """Consume a chunk and return the objects it completed"""
+        completed = []
+        for char in text:
+            if not self._started:
+                if char != "{":
+                    continue
+                self._started = True
+
+            if self._capture is not None:
+                self._capture.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._top_level_string("".join(self._string))
+                    continue
+                if len(self._stack) == 1:
+                    self._string.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string = []
+            elif char in "{[":
+                if char == "{" and self._in_array and len(self._stack) == 2:
+                    self._capture = ["{"]
+                if char == "[" and len(self._stack) == 1 and self._pending_key == self.array_key:
+                    self._in_array = True
+                self._stack.append(char)
+            elif char in "}]":
+                if char == "}" and len(self._stack) == 1:
+                    self._top_level_scalar()
+                if self._stack:
+                    self._stack.pop()
+                if char == "}" and self._capture is not None and len(self._stack) == 2:
+                    try:
+                        completed.append(json.loads("".join(self._capture)))
+                    except ValueError:
+                        pass
+                    self._capture = None
+                if char == "]" and len(self._stack) == 1:
+                    self._in_array = False
+            elif len(self._stack) == 1:
+                if char == ":":
+                    self._pending_key = self._last_string
+                    self._scalar = []
+                elif char == ",":
+                    self._top_level_scalar()
+                    self._pending_key = None
+                elif self._pending_key is not None and not char.isspace():
+                    self._scalar.append(char)
+        return completed
+
+    def _top_level_scalar(self) -> None:
+        if self._scalar and self._pending_key is not None:
+            try:
+                self.fields[self._pending_key] = json.loads("".join(self._scalar))
+            except ValueError:
+                pass
+        self._scalar = []
+
+    def _top_level_string(self, raw: str) -> None:
+        try:
+            value = json.loads(f'"{raw}"')
+        except ValueError:
+            value = raw
+        if self._pending_key is None:
+            self._last_string = value
+        else:
+            self.fields[self._pending_key] = value
@@ -1,23 +1,298 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 import openai
 import os
 from datetime import datetime
+from llm.llm_cache import LLMCache, get_cache
 
-def get_llm_response(prompt):
-    """Get response from OpenAI for non-browser tasks"""
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_SYSTEM_PROMPT = "You are a helpful AI assistant. Provide concise and accurate responses."
+
+
+class LLMClientManager:
+    """Builds OpenAI clients once and hands out the same pooled instances.
+    
+    Settings default to LLM_* environment variables; `base_url` (or
+    OPENAI_BASE_URL) can point the clients at a local stub server.
+    """
+    
+    def __init__(self, api_key=None, base_url=None, pool_size=None, timeout=None,
+                 connect_timeout=None, max_retries=None):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+        self.pool_size = int(pool_size or os.getenv("LLM_POOL_SIZE", 20))
+        self.timeout = float(timeout or os.getenv("LLM_TIMEOUT", 60))
+        self.connect_timeout = float(connect_timeout or os.getenv("LLM_CONNECT_TIMEOUT", 5))
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv("LLM_MAX_RETRIES", 2))
+        self._client = None
+        # Async clients hold loop-bound connections, so keep one per event loop
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+    
+    def _http_settings(self) -> dict:
+        return {
+            "limits": httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            "timeout": httpx.Timeout(self.timeout, connect=self.connect_timeout),
+        }
+    
+    def get_client(self) -> openai.OpenAI:
+        with self._lock:
+            if self._client is None:
+                self._client = openai.OpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    max_retries=self.max_retries,
+                    http_client=httpx.Client(**self._http_settings())
+                )
+            return self._client
+    
+    def get_async_client(self) -> openai.AsyncOpenAI:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = openai.AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    max_retries=self.max_retries,
+                    http_client=httpx.AsyncClient(**self._http_settings())
+                )
+                self._async_clients[loop] = client
+            return client
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_client_manager() -> LLMClientManager:
+    """Return the process-wide client manager"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = LLMClientManager()
+        return _manager
+
+def configure_llm_client(manager=None, **settings) -> LLMClientManager:
+    """Replace the shared client manager, e.g. to inject a stub or retune the pool"""
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.close()
+        _manager = manager or LLMClientManager(**settings)
+        return _manager
+
+def _cache_for(use_cache):
+    if use_cache and not os.getenv("LLM_CACHE_DISABLED"):
+        return get_cache()
+    return None
+
+def get_llm_response(prompt, model=DEFAULT_MODEL, system_prompt=DEFAULT_SYSTEM_PROMPT,
+                     max_tokens=500, temperature=0.7, use_cache=True):
+    """Get response from OpenAI for non-browser tasks
+    
+    Successful completions are cached on (model, system prompt, prompt,
+    temperature, max_tokens); pass use_cache=False or set LLM_CACHE_DISABLED=1
+    to always go to the API.
+    """
+    cache = _cache_for(use_cache)
+    key = LLMCache.make_key(model, system_prompt, prompt, temperature, max_tokens)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    
+    try:
+        content = _complete(prompt, model, system_prompt, max_tokens, temperature)
+        if cache is not None and content is not None:
+            cache.set(key, content)
+        return content
+        
+    except Exception as e:
+        return f"Sorry, I encountered an error: {str(e)}"
+
+def stream_llm_response(prompt, model=DEFAULT_MODEL, system_prompt=DEFAULT_SYSTEM_PROMPT,
+                        max_tokens=500, temperature=0.7, use_cache=True):
+    """Yield the completion text incrementally as the model produces it
+    
+    The concatenated chunks equal what get_llm_response would return for the
+    same arguments; cached answers are yielded as a single chunk.
+    """
+    cache = _cache_for(use_cache)
+    key = LLMCache.make_key(model, system_prompt, prompt, temperature, max_tokens)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+    
+    chunks = []
+    try:
+        client = get_client_manager().get_client()
+        stream = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                chunks.append(delta)
+                yield delta
+        
+    except Exception as e:
+        if not chunks:
+            yield f"Sorry, I encountered an error: {str(e)}"
+        return
+    
+    if cache is not None and chunks:
+        cache.set(key, "".join(chunks))
+
+def _complete(prompt, model, system_prompt, max_tokens, temperature, max_retries=None):
+    """Single chat completion through the shared client; raises on failure.
+
+    `max_retries` overrides the client's own retry count for this call.
+    """
+    client = get_client_manager().get_client()
+    if max_retries is not None:
+        client = client.with_options(max_retries=max_retries)
+    
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=max_tokens,
+        temperature=temperature
+    )
+    return response.choices[0].message.content
+
+async def aget_llm_response(prompt, model=DEFAULT_MODEL, system_prompt=DEFAULT_SYSTEM_PROMPT,
+                            max_tokens=500, temperature=0.7, use_cache=True):
+    """Async counterpart of get_llm_response using the pooled AsyncOpenAI client"""
+    cache = _cache_for(use_cache)
+    key = LLMCache.make_key(model, system_prompt, prompt, temperature, max_tokens)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    
     try:
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        client = get_client_manager().get_async_client()
         
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        response = await client.chat.completions.create(
+            model=model,
             messages=[
-                {"role": "system", "content": "You are a helpful AI assistant. Provide concise and accurate responses."},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt}
             ],
-            max_tokens=500,
-            temperature=0.7
+            max_tokens=max_tokens,
+            temperature=temperature
         )
         
-        return response.choices[0].message.content
+        content = response.choices[0].message.content
+        if cache is not None and content is not None:
+            cache.set(key, content)
+        return content
         
     except Exception as e:
-        return f"Sorry, I encountered an error: {str(e)}"
\ No newline at end of file
+        return f"Sorry, I encountered an error: {str(e)}"
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait_for = (tokens - self.tokens) / self.rate
+            time.sleep(wait_for)
+
+def _retry_after(error):
+    """Seconds the API asked us to wait, if it said so"""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+def get_llm_responses(prompts, max_concurrency=8, requests_per_second=None, max_attempts=5,
+                      model=DEFAULT_MODEL, system_prompt=DEFAULT_SYSTEM_PROMPT,
+                      max_tokens=500, temperature=0.7, use_cache=True):
+    """Get responses for many prompts concurrently, in the order given
+    
+    Identical prompts are sent once. Calls share a token bucket
+    (requests_per_second, default LLM_REQUESTS_PER_SECOND or unlimited) and
+    back off exponentially with jitter on rate-limit and transient errors.
+    Failed prompts get the same error string get_llm_response would return.
+    """
+    prompts = list(prompts)
+    unique = list(dict.fromkeys(prompts))
+    rps = requests_per_second or float(os.getenv("LLM_REQUESTS_PER_SECOND", 0))
+    bucket = TokenBucket(rps) if rps else None
+    cache = _cache_for(use_cache)
+    
+    def fetch(prompt):
+        key = LLMCache.make_key(model, system_prompt, prompt, temperature, max_tokens)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        
+        delay = 1.0
+        for attempt in range(1, max_attempts + 1):
+            if bucket is not None:
+                bucket.acquire()
+            try:
+                # This loop is the only retry layer, so every attempt waits for the rate limiter
+                content = _complete(prompt, model, system_prompt, max_tokens, temperature, max_retries=0)
+                if cache is not None and content is not None:
+                    cache.set(key, content)
+                return content
+            except (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError) as e:
+                if attempt == max_attempts:
+                    return f"Sorry, I encountered an error: {str(e)}"
+                time.sleep(_retry_after(e) or delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, 30)
+            except Exception as e:
+                return f"Sorry, I encountered an error: {str(e)}"
+    
+    if not unique:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(unique)))) as pool:
+        answers = dict(zip(unique, pool.map(fetch, unique)))
+    return [answers[prompt] for prompt in prompts]
+
+def get_llm_cache_stats():
+    """Hit/miss counters for the LLM response cache"""
+    return get_cache().stats()
@@ -1,10 +1,53 @@
 
+import json
+import sqlite3
 from fastapi import FastAPI, Request
-from agents import browser_agent, api_agent, sql_agent, file_agent
+from fastapi.responses import JSONResponse, StreamingResponse
+from agents import browser_agent, sql_agent, file_agent
+from agents.async_api_agent import AsyncAPIAgent, close_client_session
+from agents.browser_pool import close_all_browser_pools
+from agents.file_agent import FileAgent
+from agents.http_policy import RequestPolicy
+from agents.sql_agent import SQLAgent
+from agents.sqlite_pool import close_all_pools
 from llm.llm_interface import prompt_llm
 
 app = FastAPI(title="MCP AI Agent", description="Multi-Agent Task Orchestrator", version="1.0")
 
+# Shared by every API task so circuit-breaker state carries over between requests
+api_policy = RequestPolicy()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await close_client_session()
+    close_all_pools()
+    close_all_browser_pools()
+
+async def run_api_task(task: dict) -> dict:
+    """Run an API task on the event loop via the pooled aiohttp client"""
+    agent = AsyncAPIAgent(
+        max_concurrency=task.get("concurrency", 10),
+        per_host_limit=task.get("per_host_limit"),
+        policy=api_policy
+    )
+    if task.get("prompt"):
+        return {"report": await agent.arun_task(task["prompt"])}
+    
+    test_plan = task.get("plan") or {
+        "base_url": "",
+        "endpoints": [{
+            "name": task.get("name", "API Test"),
+            "method": task.get("method", "GET"),
+            "path": task.get("url", ""),
+            "headers": task.get("headers", {}),
+            "data": task.get("data", {}),
+            "expected_status": task.get("expected_status", 200),
+            "validations": task.get("validations", []),
+            "load": task.get("load")
+        }]
+    }
+    return {"report": await agent.arun_plan(test_plan)}
+
 @app.get("/")
 async def root():
     return {"status": "MCP AI Agent is running"}
@@ -15,7 +58,7 @@ async def run_task(task: dict):
     if task_type == "browser":
         return browser_agent.handle(task)
     elif task_type == "api":
-        return api_agent.handle(task)
+        return await run_api_task(task)
     elif task_type == "sql":
         return sql_agent.handle(task)
     elif task_type == "file":
@@ -23,6 +66,46 @@ async def run_task(task: dict):
     else:
         return {"error": "Unknown task type"}
 
+@app.post("/sql/stream")
+def stream_sql(task: dict):
+    """Stream SELECT results as NDJSON, one row per line"""
+    try:
+        rows = SQLAgent().stream(task)
+    except (ValueError, sqlite3.Error) as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    lines = (json.dumps(list(row), default=str) + "\n" for row in rows)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+@app.post("/files/stream")
+def stream_files(task: dict):
+    """Stream a list/walk as NDJSON, one entry per line"""
+    entries = FileAgent().iter_files(task)
+    lines = (json.dumps(entry.to_dict()) + "\n" for entry in entries)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+@app.post("/files/watch")
+async def watch_files(task: dict):
+    """Stream change events for a path as NDJSON until the client disconnects"""
+    # Async so a disconnect cancels the stream; awatch then stops its watcher thread
+    events = FileAgent().awatch(task)
+
+    async def lines():
+        async for event in events:
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+BATCH_AGENTS = {"sql": SQLAgent, "file": FileAgent}
+
+@app.post("/batch/{agent_name}")
+def run_batch(agent_name: str, tasks: list[dict]):
+    """Run a batch of SQL or file tasks as one unit, streaming a result line per item"""
+    if agent_name not in BATCH_AGENTS:
+        return {"error": f"Unknown batch agent: {agent_name}"}
+    results = BATCH_AGENTS[agent_name]().run_batch(tasks)
+    lines = (json.dumps(result, default=str) + "\n" for result in results)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
 @app.post("/prompt/")
 async def convert_prompt(prompt: dict):
     user_prompt = prompt.get("prompt", "")